@@ -0,0 +1,130 @@
+# answer_cache.py
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+ANSWER_CACHE_PATH = Path(".ai_doc_answers.json")
+SIMILARITY_THRESHOLD = 0.8
+MAX_ENTRIES = 1000
+
+
+def normalize_question(question: str) -> str:
+    return re.sub(r"\s+", " ", question.strip().lower()).rstrip("?!. ")
+
+
+def _identifiers(text: str) -> Set[str]:
+    # Code names (snake_case, dotted, camelCase) must match exactly: a
+    # question about parse_csv is never a near-duplicate of parse_config
+    return {
+        w for w in re.findall(r"[a-z_][\w.]*", text)
+        if "_" in w or "." in w.strip(".")
+    } | set(re.findall(r"`([^`]+)`", text))
+
+
+# Articles, auxiliaries and fillers; every other word (negations,
+# wh-words, verbs, objects) carries meaning and must match
+_FILLER_WORDS = frozenset(
+    "a an the do does did is are was were be please exactly actually really just".split()
+)
+
+
+def _content_words(text: str) -> Set[str]:
+    text = re.sub(r"\bwon't\b", "will not", text)
+    text = re.sub(r"n't\b", " not", text)  # negations must survive as "not"
+    words = (w.strip(".") for w in re.findall(r"[\w.]+", text))
+    return {w for w in words if w and w not in _FILLER_WORDS}
+
+
+class AnswerCache:
+    """
+    Answers to `ask` questions keyed by the hashes of the snippets they were
+    generated from. An answer stays valid while all of its evidence is
+    still present, unchanged, in the current index; near-duplicate
+    questions (char n-gram cosine >= threshold, same identifiers and
+    content words, same top retrieved snippet) reuse it too.
+    """
+
+    def __init__(self, path: Path = ANSWER_CACHE_PATH, threshold: float = SIMILARITY_THRESHOLD):
+        self.path = path
+        self.threshold = threshold
+        self.entries: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        if path.exists():
+            try:
+                self.entries = json.loads(path.read_text("utf-8")).get("entries", [])
+            except (ValueError, OSError):
+                self.entries = []
+
+    def get(self, question: str, top_k: int, evidence: List[str]) -> Optional[str]:
+        """
+        Exact lookup: same (normalized) question answered from the same
+        retrieved snippets.
+        """
+        norm = normalize_question(question)
+        for entry in reversed(self.entries):
+            if entry["question"] == norm and entry["top_k"] == top_k and entry["evidence"] == evidence:
+                return entry["answer"]
+        return None
+
+    def find_similar(
+        self, question: str, top_k: int, evidence: List[str], valid_evidence: Set[str]
+    ) -> Optional[str]:
+        """
+        Return the answer of the most similar past question if its
+        similarity reaches the threshold, it uses the same identifiers and
+        content words (so negations, wh-words and verbs must agree), its
+        top snippet is this question's top snippet and all of its
+        evidence is still valid.
+        """
+        if not evidence:
+            return None
+        norm = normalize_question(question)
+        idents = _identifiers(norm)
+        words = _content_words(norm)
+        candidates = [
+            e for e in self.entries
+            if e["top_k"] == top_k
+            and e["evidence"]
+            and e["evidence"][0] == evidence[0]
+            and set(e["evidence"]) <= valid_evidence
+            and _identifiers(e["question"]) == idents
+            and _content_words(e["question"]) == words
+        ]
+        if not candidates:
+            return None
+
+        from sklearn.feature_extraction.text import HashingVectorizer
+        from sklearn.metrics.pairwise import linear_kernel
+
+        # A fixed hashing space (rather than a vocabulary fit on past
+        # questions) keeps n-grams only the new question has in the score
+        vectorizer = HashingVectorizer(
+            analyzer="char_wb", ngram_range=(3, 5), n_features=2**18, alternate_sign=False
+        )
+        matrix = vectorizer.transform([e["question"] for e in candidates] + [norm])
+        scores = linear_kernel(matrix[-1], matrix[:-1]).flatten()
+        best = int(scores.argmax())
+        if scores[best] >= self.threshold:
+            return candidates[best]["answer"]
+        return None
+
+    def put(self, question: str, top_k: int, evidence: List[str], answer: str) -> None:
+        norm = normalize_question(question)
+        with self._lock:
+            self.entries = [
+                e for e in self.entries
+                if not (e["question"] == norm and e["top_k"] == top_k and e["evidence"] == evidence)
+            ]
+            self.entries.append(
+                {"question": norm, "top_k": top_k, "evidence": evidence, "answer": answer}
+            )
+            self.entries = self.entries[-MAX_ENTRIES:]
+            self._save()
+
+    def _save(self) -> None:
+        tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({"entries": self.entries}, indent=2), encoding="utf-8")
+        os.replace(tmp, self.path)
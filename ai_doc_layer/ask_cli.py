@@ -1,41 +1,99 @@
 # ask_cli.py
 from pathlib import Path
-from typing import Optional
-from .search_index import SearchIndex
+from typing import List, Optional, Tuple
+from .search_index import SearchIndex, snippet_hash
 from .llm_client import LLMClient
-from .cache import load_from_cache, save_to_cache
+from .answer_cache import AnswerCache
 from .code_parser import extract_functions_from_file
 
 DEFAULT_TOP_K = 4
+# Call-graph expansion: neighbours of the best EXPAND_TOP_HITS hits
+EXPAND_TOP_HITS = 2
+EXPAND_NEIGHBORS = 2
+ASK_PARAMS = {"max_new_tokens": 180, "temperature": 0.1}
 
 class CodebaseAssistant:
-    def __init__(self, repo_path: Path, llm: Optional[LLMClient]=None):
+    def __init__(
+        self,
+        repo_path: Path,
+        llm: Optional[LLMClient]=None,
+        answer_cache: Optional[AnswerCache]=None,
+    ):
         self.repo_path = repo_path
         self.llm = llm or LLMClient()
+        self.answers = answer_cache or AnswerCache()
         self.index = SearchIndex()
         self.index.build_index(repo_path)
 
     def _build_context(self, query: str, top_k: int = DEFAULT_TOP_K) -> str:
-        hits = self.index.query(query, top_k=top_k)
+        return self._format_context(self._expand_hits(self.index.query(query, top_k=top_k)))
+
+    def _expand_hits(self, hits, neighbors_per_hit: int = EXPAND_NEIGHBORS):
+        """
+        Return (metadata, label, snippet) for the hits followed by direct
+        callers/callees of the top hits from the call graph; label is empty
+        for plain hits and e.g. "caller of foo" for added neighbours.
+        """
+        seen = {md for md, _, _ in hits}
+        expanded = [(md, "", snippet) for md, _, snippet in hits]
+        for (path, name, lineno), _, _ in hits[:EXPAND_TOP_HITS]:
+            for md, relation, snippet in self.index.neighbors(path, lineno, limit=neighbors_per_hit):
+                if md in seen:
+                    continue
+                seen.add(md)
+                expanded.append((md, f"{relation} of {name}", snippet))
+        return expanded
+
+    def _format_context(self, hits) -> str:
         parts = []
-        for (path, name, lineno), score, snippet in hits:
-            parts.append(f"File: {path}\nFunction: {name} (line {lineno})\n---\n{snippet}\n---\n")
+        for (path, name, lineno), label, snippet in hits:
+            label = f" [{label}]" if label else ""
+            parts.append(f"File: {path}\nFunction: {name} (line {lineno}){label}\n---\n{snippet}\n---\n")
         context = "\n\n".join(parts)
         return context
 
     def ask(self, question: str, top_k: int = DEFAULT_TOP_K) -> str:
-        # Try cache first
-        cache_resp = load_from_cache(question, extra={"top_k": top_k})
+        answer, prompt, evidence = self.prepare(question, top_k=top_k)
+        if answer is not None:
+            return answer
+
+        # Use small tokens/low temperature for speed
+        resp = self.llm.generate(prompt, extra_params=ASK_PARAMS)
+        self.answers.put(question, top_k, evidence, resp)
+        return resp
+
+    def prepare(
+        self, question: str, top_k: int = DEFAULT_TOP_K
+    ) -> Tuple[Optional[str], Optional[str], List[str]]:
+        """
+        Everything in `ask` short of running the model: returns
+        (answer, None, evidence) when the symbol index or the answer cache
+        can answer, else (None, prompt, evidence).
+        """
+        # Exact-identifier questions are answered from the symbol index
+        direct = self.index.symbols.answer(question)
+        if direct:
+            return direct, None, []
+
+        # Retrieval is cheap; the cache is keyed by the evidence it returns,
+        # so answers go stale only when the snippets they cite change.
+        hits = self._expand_hits(self.index.query(question, top_k=top_k))
+        evidence = [snippet_hash(snippet) for _, _, snippet in hits]
+
+        cache_resp = self.answers.get(question, top_k, evidence)
+        if cache_resp:
+            return cache_resp, None, evidence
+
+        cache_resp = self.answers.find_similar(
+            question, top_k, evidence, set(self.index.hashes)
+        )
         if cache_resp:
-            return cache_resp
+            return cache_resp, None, evidence
 
-        context = self._build_context(question, top_k=top_k)
+        context = self._format_context(hits)
         prompt = (
             "You are an expert developer who only answers based on the provided context.\n"
             "If the answer is not present, say you could not find enough information.\n\n"
             f"Context:\n{context}\n\nQuestion: {question}\nAnswer concisely, cite files/line numbers when relevant."
         )
-        # Use small tokens/low temperature for speed
-        resp = self.llm.generate(prompt, extra_params={"max_new_tokens": 180, "temperature": 0.1})
-        save_to_cache(question, resp, extra={"top_k": top_k})
-        return resp
+        return None, prompt, evidence
@@ -0,0 +1,330 @@
+# async_api.py
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from .ask_cli import DEFAULT_TOP_K, ASK_PARAMS, CodebaseAssistant
+from .code_parser import FunctionInfo
+from .doc_generator import DocGenerator
+from .llm_client import LLMClient
+from .scheduler import docstring_budget
+
+DEFAULT_BATCH_SIZE = 8
+DEFAULT_MAX_WAIT_MS = 10.0
+DEFAULT_MAX_PENDING = 256
+
+_STREAM_END = object()
+
+
+class _Request:
+    def __init__(self, prompt: str, params: Dict[str, Any], future: asyncio.Future):
+        self.prompt = prompt
+        self.params = params
+        self.future = future
+
+
+class AsyncBatcher:
+    """
+    Coalesces prompts awaited from many coroutines into batched
+    LLMClient.generate_batch calls on a single model executor thread.
+
+    Requests arriving within max_wait_ms of each other (up to batch_size)
+    share a batch. At most max_pending requests are admitted at once;
+    further callers wait, which pushes back on producers. Cancelling an
+    awaiting coroutine drops its request if not yet dispatched, and stops
+    decoding once every request of a running batch has been cancelled.
+    """
+
+    def __init__(
+        self,
+        llm: LLMClient,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        max_wait_ms: float = DEFAULT_MAX_WAIT_MS,
+        max_pending: int = DEFAULT_MAX_PENDING,
+    ):
+        self.llm = llm
+        self.batch_size = batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ai-doc-model")
+        self._queue: Optional[asyncio.Queue] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    def _ensure_started(self) -> None:
+        # asyncio primitives must be created on the loop that uses them
+        if self._worker is None:
+            self._queue = asyncio.Queue()
+            self._slots = asyncio.Semaphore(self.max_pending)
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def submit(self, prompt: str, params: Optional[Dict[str, Any]] = None) -> str:
+        self._ensure_started()
+        async with self._slots:
+            future = asyncio.get_running_loop().create_future()
+            self._queue.put_nowait(_Request(prompt, dict(params or {}), future))
+            return await future
+
+    async def stream(self, prompt: str, params: Optional[Dict[str, Any]] = None) -> AsyncIterator[str]:
+        """
+        Yield generated text pieces as they are decoded. Streams are not
+        batched: each holds the model executor until it finishes or the
+        consumer stops iterating, which also stops decoding.
+        """
+        self._ensure_started()
+        loop = asyncio.get_running_loop()
+        pieces: asyncio.Queue = asyncio.Queue()
+        stop = threading.Event()
+
+        def produce() -> None:
+            try:
+                for piece in self.llm.stream(prompt, {**(params or {}), "should_stop": stop.is_set}):
+                    if stop.is_set():
+                        break
+                    loop.call_soon_threadsafe(pieces.put_nowait, piece)
+            except Exception as e:
+                loop.call_soon_threadsafe(pieces.put_nowait, e)
+            finally:
+                loop.call_soon_threadsafe(pieces.put_nowait, _STREAM_END)
+
+        async with self._slots:
+            loop.run_in_executor(self._executor, produce)
+            try:
+                while True:
+                    item = await pieces.get()
+                    if item is _STREAM_END:
+                        return
+                    if isinstance(item, Exception):
+                        raise item
+                    yield item
+            finally:
+                stop.set()
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            try:
+                deadline = loop.time() + self.max_wait
+                while len(batch) < self.batch_size:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+
+                # Requests cancelled while queued never reach the model
+                live = [r for r in batch if not r.future.done()]
+                groups: Dict[Tuple, List[_Request]] = {}
+                for r in live:
+                    # repr keeps unhashable values (lists, dicts) groupable
+                    key = tuple(sorted((k, repr(v)) for k, v in r.params.items() if k != "max_new_tokens"))
+                    groups.setdefault(key, []).append(r)
+                for reqs in groups.values():
+                    await self._dispatch(reqs)
+            except asyncio.CancelledError:
+                _fail(batch, RuntimeError("AsyncBatcher was closed"))
+                raise
+            except Exception as e:
+                # Fail only this batch; the worker keeps serving the queue
+                _fail(batch, e)
+
+    async def _dispatch(self, reqs: List[_Request]) -> None:
+        loop = asyncio.get_running_loop()
+        stop = threading.Event()
+        remaining = [len(reqs)]
+
+        def on_done(future: asyncio.Future) -> None:
+            # Cancelled or failed before the batch returned: nobody wants it
+            remaining[0] -= 1
+            if remaining[0] == 0:
+                stop.set()
+
+        for r in reqs:
+            r.future.add_done_callback(on_done)
+
+        params = dict(reqs[0].params)
+        budgets = [r.params["max_new_tokens"] for r in reqs if "max_new_tokens" in r.params]
+        if budgets:
+            params["max_new_tokens"] = max(budgets)
+        params["should_stop"] = stop.is_set
+
+        try:
+            outs = await loop.run_in_executor(
+                self._executor, self.llm.generate_batch, [r.prompt for r in reqs], params
+            )
+        except Exception as e:
+            _fail(reqs, e)
+            return
+
+        for r, out in zip(reqs, outs):
+            if not r.future.done():
+                r.future.set_result(out)
+
+    async def aclose(self) -> None:
+        """
+        Stop the worker. Requests still queued or running fail with
+        RuntimeError instead of leaving their callers waiting forever.
+        """
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+            pending = []
+            while not self._queue.empty():
+                pending.append(self._queue.get_nowait())
+            _fail(pending, RuntimeError("AsyncBatcher was closed"))
+        self._executor.shutdown(wait=False)
+
+
+def _fail(reqs: List[_Request], error: BaseException) -> None:
+    for r in reqs:
+        if not r.future.done():
+            r.future.set_exception(error)
+
+
+async def _off_loop(fn, *args):
+    # Cache files are read and rewritten whole; keep that off the event loop
+    return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+
+
+class AsyncDocGenerator:
+    """
+    Awaitable counterpart of DocGenerator for use inside an event loop.
+    Shares DocGenerator's prompts, dedupe map and cache; model calls from
+    concurrent coroutines are coalesced by an AsyncBatcher.
+
+    To serve docstrings and questions from one model, build one
+    AsyncBatcher and pass it to both this class and AsyncCodebaseAssistant,
+    so all requests share its executor and batches.
+    """
+
+    def __init__(
+        self,
+        doc_gen: DocGenerator,
+        batcher: Optional[AsyncBatcher] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        max_wait_ms: float = DEFAULT_MAX_WAIT_MS,
+        max_pending: int = DEFAULT_MAX_PENDING,
+    ):
+        self.doc_gen = doc_gen
+        self.batcher = batcher or AsyncBatcher(doc_gen.llm, batch_size, max_wait_ms, max_pending)
+        # body key -> [generation in flight, waiter count]; concurrent
+        # duplicates share one generation
+        self._inflight: Dict[str, List[Any]] = {}
+
+    @classmethod
+    async def create(
+        cls, llm: Optional[LLMClient] = None, batcher: Optional[AsyncBatcher] = None, **kwargs: Any
+    ) -> "AsyncDocGenerator":
+        """
+        Build the generator, loading the model (unless `llm` or `batcher`
+        supplies one) without blocking the event loop.
+        """
+        if llm is None and batcher is not None:
+            llm = batcher.llm
+        doc_gen = await _off_loop(DocGenerator, llm)
+        return cls(doc_gen, batcher=batcher, **kwargs)
+
+    async def generate_docstring(self, func: FunctionInfo, file_path: Path) -> str:
+        self.doc_gen.requested += 1
+        known = await _off_loop(self.doc_gen.known_docstring, func)
+        if known is not None:
+            return known
+        key = self.doc_gen.body_key(func)
+        entry = self._inflight.get(key)
+        if entry is None:
+            task = asyncio.ensure_future(self._generate(func))
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+            entry = self._inflight[key] = [task, 0]
+        entry[1] += 1
+        try:
+            return await asyncio.shield(entry[0])
+        except asyncio.CancelledError:
+            # Stop the shared generation only when nobody else awaits it
+            if entry[1] == 1:
+                entry[0].cancel()
+            raise
+        finally:
+            entry[1] -= 1
+
+    async def _generate(self, func: FunctionInfo) -> str:
+        raw = await self.batcher.submit(
+            self.doc_gen.docstring_prompt(func), {"max_new_tokens": docstring_budget(func)}
+        )
+        return await _off_loop(self.doc_gen.remember_docstring, func, raw)
+
+    async def generate_docstrings(
+        self, functions: List[FunctionInfo], file_path: Path
+    ) -> Dict[int, str]:
+        docs = await asyncio.gather(*(self.generate_docstring(f, file_path) for f in functions))
+        return {f.lineno: d for f, d in zip(functions, docs)}
+
+    async def generate_module_overview(self, file_path: Path, functions: List[FunctionInfo]) -> str:
+        return await self.batcher.submit(self.doc_gen.module_overview_prompt(file_path, functions))
+
+    async def generate_commit_summary(self, diff_text: str) -> str:
+        return await self.batcher.submit(self.doc_gen.commit_summary_prompt(diff_text))
+
+    def stream_module_overview(self, file_path: Path, functions: List[FunctionInfo]) -> AsyncIterator[str]:
+        return self.batcher.stream(self.doc_gen.module_overview_prompt(file_path, functions))
+
+    async def aclose(self) -> None:
+        await self.batcher.aclose()
+
+
+class AsyncCodebaseAssistant:
+    """
+    Awaitable counterpart of CodebaseAssistant. Retrieval and cache reads
+    and writes run on the default executor; generation goes through an
+    AsyncBatcher, shareable with an AsyncDocGenerator.
+    """
+
+    def __init__(self, assistant: CodebaseAssistant, batcher: Optional[AsyncBatcher] = None):
+        self.assistant = assistant
+        self.batcher = batcher or AsyncBatcher(assistant.llm)
+
+    @classmethod
+    async def create(
+        cls, repo_path: Path, llm: Optional[LLMClient] = None, batcher: Optional[AsyncBatcher] = None
+    ) -> "AsyncCodebaseAssistant":
+        """
+        Build the assistant (loads the model and indexes the repo) without
+        blocking the event loop. Pass `batcher` to share one model with an
+        AsyncDocGenerator.
+        """
+        if llm is None and batcher is not None:
+            llm = batcher.llm
+        assistant = await _off_loop(CodebaseAssistant, repo_path, llm)
+        return cls(assistant, batcher)
+
+    async def ask(self, question: str, top_k: int = DEFAULT_TOP_K) -> str:
+        answer, prompt, evidence = await _off_loop(self.assistant.prepare, question, top_k)
+        if answer is not None:
+            return answer
+        resp = await self.batcher.submit(prompt, ASK_PARAMS)
+        await _off_loop(self.assistant.answers.put, question, top_k, evidence, resp)
+        return resp
+
+    async def ask_stream(self, question: str, top_k: int = DEFAULT_TOP_K) -> AsyncIterator[str]:
+        answer, prompt, evidence = await _off_loop(self.assistant.prepare, question, top_k)
+        if answer is not None:
+            yield answer
+            return
+
+        pieces = []
+        async for piece in self.batcher.stream(prompt, ASK_PARAMS):
+            pieces.append(piece)
+            yield piece
+        # Only complete answers are cached
+        await _off_loop(self.assistant.answers.put, question, top_k, evidence, "".join(pieces).strip())
+
+    async def aclose(self) -> None:
+        await self.batcher.aclose()
@@ -0,0 +1,208 @@
+# backends.py
+import hashlib
+import re
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Type
+
+from .config import ONNX_EXPORT_DIR
+
+
+class InferenceBackend:
+    """
+    Interface every inference runtime implements. Prompts passed in are
+    already fully formatted; outputs contain only the newly generated text.
+
+    params may carry "should_stop", a no-argument callable polled during
+    decoding; once it returns True the backend stops generating early.
+    """
+
+    name = "base"
+
+    def load(self, model_id: str) -> None:
+        raise NotImplementedError
+
+    def load_tokenizer(self, model_id: str) -> None:
+        """
+        Load just enough to tokenize (count_tokens), not the model weights.
+        """
+        self.load(model_id)
+
+    def tokenize(self, text: str) -> List[int]:
+        raise NotImplementedError
+
+    def generate(self, prompt: str, params: Dict[str, Any]) -> str:
+        return self.generate_batch([prompt], params)[0]
+
+    def generate_batch(self, prompts: List[str], params: Dict[str, Any]) -> List[str]:
+        raise NotImplementedError
+
+    def stream(self, prompt: str, params: Dict[str, Any]) -> Iterator[str]:
+        # Backends without incremental decoding yield the whole answer at once
+        yield self.generate(prompt, params)
+
+
+class HFBackend(InferenceBackend):
+    """
+    transformers AutoModelForCausalLM running on torch (GPU if available).
+    """
+
+    name = "hf"
+
+    def load(self, model_id: str) -> None:
+        self.load_tokenizer(model_id)
+        self.model = self._load_model(model_id)
+
+    def load_tokenizer(self, model_id: str) -> None:
+        from transformers import AutoTokenizer
+
+        self.model_id = model_id
+        self.tokenizer = AutoTokenizer.from_pretrained(model_id)
+        if self.tokenizer.pad_token is None:
+            self.tokenizer.pad_token = self.tokenizer.eos_token
+
+    def _load_model(self, model_id: str):
+        import torch
+        from transformers import AutoModelForCausalLM
+
+        return AutoModelForCausalLM.from_pretrained(
+            model_id,
+            torch_dtype=torch.float16 if torch.cuda.is_available() else torch.float32,
+            device_map="auto" if torch.cuda.is_available() else None,
+        )
+
+    def tokenize(self, text: str) -> List[int]:
+        return self.tokenizer(text)["input_ids"]
+
+    def _generate_kwargs(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        kwargs = {
+            "max_new_tokens": params["max_new_tokens"],
+            "temperature": params["temperature"],
+            "do_sample": params["do_sample"],
+            "pad_token_id": self.tokenizer.pad_token_id,
+        }
+        if params.get("should_stop"):
+            kwargs["stopping_criteria"] = _stopping_criteria(params["should_stop"])
+        return kwargs
+
+    def generate_batch(self, prompts: List[str], params: Dict[str, Any]) -> List[str]:
+        import torch
+
+        # Left padding keeps every prompt flush against its generated tokens
+        self.tokenizer.padding_side = "left"
+        encoded = self.tokenizer(prompts, return_tensors="pt", padding=True).to(self.model.device)
+        with torch.no_grad():
+            out = self.model.generate(**encoded, **self._generate_kwargs(params))
+
+        prompt_len = encoded["input_ids"].shape[1]
+        return [
+            self.tokenizer.decode(seq[prompt_len:], skip_special_tokens=True)
+            for seq in out
+        ]
+
+    def stream(self, prompt: str, params: Dict[str, Any]) -> Iterator[str]:
+        from transformers import TextIteratorStreamer
+
+        encoded = self.tokenizer(prompt, return_tensors="pt").to(self.model.device)
+        streamer = TextIteratorStreamer(self.tokenizer, skip_prompt=True, skip_special_tokens=True)
+        worker = threading.Thread(
+            target=self.model.generate,
+            kwargs={**encoded, **self._generate_kwargs(params), "streamer": streamer},
+            daemon=True,
+        )
+        worker.start()
+        for piece in streamer:
+            yield piece
+        worker.join()
+
+
+def _stopping_criteria(should_stop: Callable[[], bool]):
+    import torch
+    from transformers import StoppingCriteria, StoppingCriteriaList
+
+    class _StopWhen(StoppingCriteria):
+        def __call__(self, input_ids, scores, **kwargs):
+            return torch.full(
+                (input_ids.shape[0],), bool(should_stop()), dtype=torch.bool, device=input_ids.device
+            )
+
+    return StoppingCriteriaList([_StopWhen()])
+
+
+class ONNXBackend(HFBackend):
+    """
+    ONNX Runtime on CPU via optimum. The model is exported from the local
+    HF cache on first use and the exported graph is reused afterwards.
+    """
+
+    name = "onnx"
+
+    def export_dir(self, model_id: str) -> Path:
+        return Path(ONNX_EXPORT_DIR) / re.sub(r"[^A-Za-z0-9_.-]", "_", model_id)
+
+    def _load_model(self, model_id: str):
+        try:
+            from optimum.onnxruntime import ORTModelForCausalLM
+        except ImportError as e:
+            raise ImportError(
+                "The onnx backend needs optimum with ONNX Runtime: "
+                "pip install 'optimum[onnxruntime]'"
+            ) from e
+
+        target = self.export_dir(model_id)
+        if (target / "config.json").exists():
+            return ORTModelForCausalLM.from_pretrained(target, provider="CPUExecutionProvider")
+
+        model = ORTModelForCausalLM.from_pretrained(
+            model_id, export=True, provider="CPUExecutionProvider"
+        )
+        model.save_pretrained(target)
+        return model
+
+
+class FakeBackend(InferenceBackend):
+    """
+    Deterministic, dependency-free backend for tests: the output depends
+    only on the prompt and max_new_tokens.
+    """
+
+    name = "fake"
+
+    def load(self, model_id: str) -> None:
+        self.model_id = model_id
+
+    def tokenize(self, text: str) -> List[int]:
+        return [int(hashlib.md5(w.encode()).hexdigest()[:6], 16) for w in text.split()]
+
+    def generate_batch(self, prompts: List[str], params: Dict[str, Any]) -> List[str]:
+        should_stop = params.get("should_stop") or (lambda: False)
+        return [
+            "" if should_stop() else self._respond(p, params["max_new_tokens"])
+            for p in prompts
+        ]
+
+    def stream(self, prompt: str, params: Dict[str, Any]) -> Iterator[str]:
+        should_stop = params.get("should_stop") or (lambda: False)
+        for i, word in enumerate(self._respond(prompt, params["max_new_tokens"]).split()):
+            if should_stop():
+                return
+            yield word if i == 0 else " " + word
+
+    def _respond(self, prompt: str, max_new_tokens: int) -> str:
+        digest = hashlib.sha256(prompt.encode()).hexdigest()
+        words = ["Fake", "response", digest[:12] + "."]
+        return " ".join(words[:max(1, max_new_tokens)])
+
+
+BACKENDS: Dict[str, Type[InferenceBackend]] = {
+    HFBackend.name: HFBackend,
+    ONNXBackend.name: ONNXBackend,
+    FakeBackend.name: FakeBackend,
+}
+
+
+def get_backend(name: str) -> InferenceBackend:
+    try:
+        return BACKENDS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown LLM backend {name!r}; choose from {sorted(BACKENDS)}.")
@@ -1,10 +1,45 @@
 # cache.py
 import json
 import hashlib
+import os
+import threading
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
 
 CACHE_PATH = Path(".ai_doc_cache.json")
+# Serializes read-modify-write of the cache file between threads
+_save_lock = threading.Lock()
+
+
+@contextmanager
+def _cache_lock() -> Iterator[None]:
+    """
+    Hold the cache for a read-modify-write across threads and processes
+    (e.g. several local shards), so no writer drops another's entries.
+    """
+    with _save_lock:
+        lock_path = CACHE_PATH.with_name(CACHE_PATH.name + ".lock")
+        with open(lock_path, "a+b") as fh:
+            if fcntl is not None:
+                fcntl.flock(fh, fcntl.LOCK_EX)
+            else:
+                fh.seek(0)
+                msvcrt.locking(fh.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(fh, fcntl.LOCK_UN)
+                else:
+                    fh.seek(0)
+                    msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
 
 def _hash(prompt: str, extra: Optional[dict] = None):
     s = prompt + (json.dumps(extra, sort_keys=True) if extra else "")
@@ -17,10 +52,14 @@ def load_from_cache(prompt: str, extra=None) -> Optional[str]:
     return data.get(_hash(prompt, extra), None)
 
 def save_to_cache(prompt: str, response: str, extra=None):
-    if CACHE_PATH.exists():
-        data = json.loads(CACHE_PATH.read_text("utf-8"))
-    else:
-        data = {}
+    with _cache_lock():
+        if CACHE_PATH.exists():
+            data = json.loads(CACHE_PATH.read_text("utf-8"))
+        else:
+            data = {}
 
-    data[_hash(prompt, extra)] = response
-    CACHE_PATH.write_text(json.dumps(data, indent=2), encoding="utf-8")
+        data[_hash(prompt, extra)] = response
+        # Atomic replace so parallel shard processes never read a torn file
+        tmp = CACHE_PATH.with_name(f"{CACHE_PATH.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(data, indent=2), encoding="utf-8")
+        os.replace(tmp, CACHE_PATH)
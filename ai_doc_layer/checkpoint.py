@@ -0,0 +1,101 @@
+# checkpoint.py
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+JOURNAL_NAME = ".ai_doc_journal.json"
+
+# Per-file stages, in the order `generate` completes them.
+STAGES = ("parsed", "generated", "injected", "markdown")
+
+
+def file_hash(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def text_hash(text: str) -> str:
+    """
+    Hash a file would have once `text` is written with write_source.
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class Journal:
+    """
+    Per-file completion state for a `generate` run, flushed to disk every
+    `flush_every` updates so an interrupted run can be resumed.
+
+    Each entry records the last completed stage and the hash of the file
+    as it was on disk after that stage; a mismatch on resume means the
+    file was edited since and must be redone. Before a stage rewrites the
+    file, its expected hash is persisted as an intent, so a run killed
+    between the write and its record still resumes correctly.
+    """
+
+    def __init__(self, path: Path, flush_every: int = 10):
+        self.path = path
+        self.flush_every = flush_every
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._dirty = 0
+
+    @classmethod
+    def load(cls, path: Path, flush_every: int = 10) -> "Journal":
+        journal = cls(path, flush_every=flush_every)
+        if path.exists():
+            try:
+                journal.entries = json.loads(path.read_text("utf-8")).get("files", {})
+            except (ValueError, OSError):
+                journal.entries = {}
+        return journal
+
+    def get(self, rel: str, current_hash: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the entry for rel if the file is unchanged since it was
+        recorded, else None.
+        """
+        entry = self.entries.get(rel)
+        if entry is None:
+            return None
+        if entry.get("hash") != current_hash:
+            intent = entry.get("intent")
+            if not intent or intent["hash"] != current_hash:
+                return None
+            # The intended write landed but the run died before recording it
+            self.record(rel, intent["stage"], current_hash)
+        return entry
+
+    def record(self, rel: str, stage: str, hash_: str, flush: bool = False, **data: Any) -> None:
+        entry = self.entries.setdefault(rel, {})
+        entry.update(data)
+        entry.pop("intent", None)
+        entry["stage"] = stage
+        entry["hash"] = hash_
+        self._dirty += 1
+        if flush or self._dirty >= self.flush_every:
+            self.flush()
+
+    def intend(self, rel: str, stage: str, expected_hash: str) -> None:
+        """
+        Persist, before rewriting a file, the stage and hash it will have
+        once the write lands.
+        """
+        entry = self.entries.setdefault(rel, {})
+        entry["intent"] = {"stage": stage, "hash": expected_hash}
+        self._dirty += 1
+        self.flush()
+
+    def flush(self) -> None:
+        if not self._dirty and self.path.exists():
+            return
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps({"files": self.entries}, indent=2), encoding="utf-8")
+        os.replace(tmp, self.path)
+        self._dirty = 0
+
+
+def stage_reached(entry: Optional[Dict[str, Any]], stage: str) -> bool:
+    if not entry or entry.get("stage") not in STAGES:
+        return False
+    return STAGES.index(entry["stage"]) >= STAGES.index(stage)
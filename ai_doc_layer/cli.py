@@ -1,12 +1,37 @@
+import time
 from pathlib import Path
-from typing import Optional
+from itertools import islice
+from typing import Iterable, List, Optional, Tuple
 
 import click
 
-from .code_parser import find_python_files, extract_functions_from_file
+from .code_parser import FunctionInfo, extract_functions_from_file
+from .file_discovery import iter_python_files
+from .checkpoint import JOURNAL_NAME, Journal, file_hash, stage_reached, text_hash
+from .config import DOCS_DIR_NAME
+from .sharding import (
+    SHARDS_DIR_NAME,
+    ShardManifest,
+    assign_shards,
+    default_manifest_path,
+    entry_functions,
+    iter_manifest_entries,
+    parse_shard_spec,
+)
 from .diff_analyzer import get_changed_files, get_diff_text
 from .doc_generator import DocGenerator
-from .writer import inject_docstrings_into_file, write_module_markdown
+from .llm_client import LLMClient
+from .inference_pool import InferencePool, available_cpus, split_cpus
+from .backends import BACKENDS
+from .scheduler import WorkItem, docstring_budget, file_order_batches, padding_stats, plan_batches
+from .writer import (
+    docs_after_injection,
+    inject_docstrings_into_file,
+    render_injected,
+    write_module_markdown,
+    write_source,
+)
+from .site_builder import SITE_DIR_NAME, build_site
 from .uml_generator import generate_repo_uml
 from .ask_cli import CodebaseAssistant
 
@@ -18,44 +43,325 @@ def cli():
 @cli.command()
 @click.argument("repo", type=click.Path(exists=True, file_okay=False))
 @click.option("--only-changed", is_flag=True, help="Only process files changed in last commit.")
-def generate(repo: str, only_changed: bool):
+@click.option("--include", multiple=True, help="Glob of files to process (repeatable, default: *.py).")
+@click.option("--exclude", multiple=True, help="Glob of files/directories to skip (repeatable).")
+@click.option("--no-gitignore", is_flag=True, help="Do not honour .gitignore files.")
+@click.option("--tracked-only", is_flag=True, help="Only process files tracked by git (uses git ls-files).")
+@click.option("--resume", is_flag=True, help="Continue from the last checkpoint, redoing files edited since.")
+@click.option("--shard", default=None, help="Only generate shard i of n (e.g. 2/4); results go to a manifest for `merge`.")
+@click.option("--manifest", type=click.Path(dir_okay=False), default=None, help="Shard manifest path (default: ai_docs/shards/shard-i-of-n.json).")
+@click.option("--replicas", type=int, default=1, help="Model replicas in worker processes, each pinned to its own CPUs; use with --batch-size >= replicas.")
+@click.option("--batch-size", type=int, default=1, help="Batch docstring prompts, bucketed by length and token budget.")
+def generate(
+    repo: str,
+    only_changed: bool,
+    include: Tuple[str, ...],
+    exclude: Tuple[str, ...],
+    no_gitignore: bool,
+    tracked_only: bool,
+    resume: bool,
+    shard: Optional[str],
+    manifest: Optional[str],
+    replicas: int,
+    batch_size: int,
+):
     """
     Generate documentation for a Python repository.
+
+    --replicas only pays off together with --batch-size (at least the
+    replica count): batches spanning several files are spread across the
+    replicas, while without batching one file's functions are in flight.
     """
     repo_path = Path(repo).resolve()
     click.echo(f"Using repo: {repo_path}")
 
-    doc_gen = DocGenerator()
-
     if only_changed:
         files = get_changed_files(repo_path)
         if not files:
             click.echo("No changed Python files detected between HEAD~1 and HEAD.")
             return
+        click.echo(f"Found {len(files)} Python files to process.")
     else:
-        files = find_python_files(repo_path)
+        # Stream files so processing starts before discovery finishes
+        try:
+            files = iter_python_files(
+                repo_path,
+                include=include,
+                exclude=exclude,
+                use_gitignore=not no_gitignore,
+                tracked_only=tracked_only,
+            )
+        except ValueError as e:
+            raise click.UsageError(str(e))
 
-    click.echo(f"Found {len(files)} Python files to process.")
+    if shard:
+        try:
+            shard_i, shard_n = parse_shard_spec(shard)
+        except ValueError as e:
+            raise click.BadParameter(str(e), param_hint="--shard")
 
-    for file_path in files:
-        click.echo(f"Processing {file_path} ...")
-        functions = extract_functions_from_file(file_path)
-        if not functions:
+    if replicas > 1:
+        try:
+            split_cpus(available_cpus(), replicas)
+        except ValueError as e:
+            raise click.BadParameter(str(e), param_hint="--replicas")
+
+    # Load the model only once the arguments are known to be usable
+    if replicas > 1:
+        pool = InferencePool(replicas)
+        click.echo(f"Started {replicas} replicas on CPU sets {pool.cpu_sets}")
+        click.get_current_context().call_on_close(pool.close)
+        doc_gen = DocGenerator(llm=pool, max_workers=replicas, batch_size=batch_size)
+    else:
+        doc_gen = DocGenerator(batch_size=batch_size)
+
+    if shard:
+        manifest_path = (
+            Path(manifest).resolve() if manifest
+            else default_manifest_path(repo_path, shard_i, shard_n)
+        )
+        _generate_shard(repo_path, files, doc_gen, shard_i, shard_n, manifest_path, resume)
+        return
+
+    journal_path = repo_path / JOURNAL_NAME
+    journal = Journal.load(journal_path) if resume else Journal(journal_path)
+
+    processed = 0
+    skipped = 0
+    # With batching, docstrings for a window of files are scheduled together
+    window_size = SCHEDULE_WINDOW_FILES if batch_size > 1 else 1
+    files = iter(files)
+    try:
+        while True:
+            window = list(islice(files, window_size))
+            if not window:
+                break
+            if window_size > 1:
+                _pregenerate_window(repo_path, window, doc_gen, journal)
+            for file_path in window:
+                processed += 1
+                if not _document_file(repo_path, file_path, doc_gen, journal):
+                    skipped += 1
+    finally:
+        journal.flush()
+
+    if resume:
+        click.echo(f"Resumed: {skipped} files already complete at last checkpoint.")
+    click.echo(doc_gen.dedupe_summary())
+    click.echo(f"Documentation generation completed ({processed} files).")
+    _build_docs_site(repo_path)
+
+
+# Files whose docstrings are scheduled together when --batch-size > 1
+SCHEDULE_WINDOW_FILES = 32
+
+
+def _build_docs_site(repo_path: Path) -> None:
+    written, unchanged, removed = build_site(repo_path)
+    click.echo(
+        f"Docs site: {written} pages written, {unchanged} unchanged, {removed} removed "
+        f"({repo_path / DOCS_DIR_NAME / SITE_DIR_NAME / 'index.html'})."
+    )
+
+
+@cli.command()
+@click.argument("repo", type=click.Path(exists=True, file_okay=False))
+def build_docs(repo: str):
+    """Rebuild the static docs site (ai_docs/site) from generated module docs."""
+    _build_docs_site(Path(repo).resolve())
+
+
+def _pregenerate_window(
+    repo_path: Path, window: List[Path], doc_gen: DocGenerator, journal: Journal
+) -> None:
+    """
+    Generate docstrings for every not-yet-generated file in the window in
+    one scheduled pass and record them in the journal, where
+    _document_file picks them up.
+    """
+    todo = []
+    for file_path in window:
+        rel = str(file_path.relative_to(repo_path))
+        current = file_hash(file_path)
+        if stage_reached(journal.get(rel, current), "generated"):
             continue
+        functions = _parse_functions(file_path)
+        if functions:
+            todo.append((rel, current, file_path, functions))
+    if not todo:
+        return
+
+    items = [(f, file_path) for _, _, file_path, functions in todo for f in functions]
+    docs = iter(doc_gen.generate_docstrings_scheduled(items))
+    for rel, current, _, functions in todo:
+        func_docs = {f.lineno: next(docs) for f in functions}
+        journal.record(rel, "generated", current, docs=func_docs)
+
+
+def _parse_functions(file_path: Path) -> Optional[List[FunctionInfo]]:
+    # One file that does not parse must not stop the whole run
+    try:
+        return extract_functions_from_file(file_path)
+    except (SyntaxError, UnicodeDecodeError) as e:
+        click.echo(f"Skipping {file_path} (cannot parse: {e})")
+        return None
+
+
+def _document_file(
+    repo_path: Path, file_path: Path, doc_gen: DocGenerator, journal: Journal
+) -> bool:
+    """
+    Run every remaining stage for one file, recording each in the journal.
+    Returns False if the file was already complete.
+    """
+    rel = str(file_path.relative_to(repo_path))
+    current = file_hash(file_path)
+    entry = journal.get(rel, current)
+
+    if stage_reached(entry, "markdown"):
+        click.echo(f"Skipping {file_path} (done)")
+        return False
 
-        func_docs = {}
-        for func in functions:
-            ds = doc_gen.generate_docstring(func, file_path)
-            func_docs[func.lineno] = ds
+    click.echo(f"Processing {file_path} ...")
+    functions = _parse_functions(file_path)
+    if functions is None:
+        return True  # not recorded, so it is retried once fixed
+    if not functions:
+        journal.record(rel, "markdown", current)
+        return True
+    if not stage_reached(entry, "parsed"):
+        journal.record(rel, "parsed", current)
+
+    if stage_reached(entry, "generated"):
+        func_docs = {int(k): v for k, v in entry.get("docs", {}).items()}
+    else:
+        func_docs = doc_gen.generate_docstrings(functions, file_path)
+        journal.record(rel, "generated", current, docs=func_docs)
 
-        # Inject docstrings into code (in-place)
-        inject_docstrings_into_file(file_path, func_docs)
+    if not stage_reached(entry, "injected"):
+        # Inject docstrings into code (in-place). The journal must never lag
+        # the file here, or a resumed run would inject a second time.
+        injected = render_injected(file_path.read_text(encoding="utf-8"), func_docs)
+        current = text_hash(injected)
+        journal.intend(rel, "injected", current)
+        write_source(file_path, injected)
+        journal.record(rel, "injected", current, flush=True)
 
-        # Write module-level Markdown
-        module_md = doc_gen.generate_module_overview(file_path, functions)
-        write_module_markdown(repo_path, file_path, module_md, functions)
+    # Docs are written with post-injection line numbers, fresh or resumed
+    functions, docs_by_line = docs_after_injection(file_path, functions, func_docs)
 
-    click.echo("Documentation generation completed.")
+    # Write module-level Markdown
+    module_md = doc_gen.generate_module_overview(file_path, functions)
+    write_module_markdown(repo_path, file_path, module_md, functions, docs_by_line)
+    journal.record(rel, "markdown", current)
+    return True
+
+
+def _generate_shard(
+    repo_path: Path,
+    files: Iterable[Path],
+    doc_gen: DocGenerator,
+    shard: int,
+    total: int,
+    manifest_path: Path,
+    resume: bool,
+) -> None:
+    """
+    Generate docstrings and overviews for this shard's files into a
+    manifest, without touching the source tree.
+    """
+    # Every shard parses the full file set so they all agree on the split
+    weights = {}
+    for file_path in files:
+        rel = file_path.relative_to(repo_path).as_posix()
+        weights[rel] = len(_parse_functions(file_path) or [])  # unparseable: nothing to do
+    assignment = assign_shards(weights, total)
+    mine = [rel for rel in sorted(weights) if assignment[rel] == shard]
+    click.echo(f"Shard {shard}/{total}: {len(mine)} of {len(weights)} files.")
+
+    if resume and manifest_path.exists():
+        result = ShardManifest.load(manifest_path)
+    else:
+        result = ShardManifest(manifest_path, shard, total)
+
+    try:
+        for count, rel in enumerate(mine, start=1):
+            file_path = repo_path / rel
+            current = file_hash(file_path)
+            if rel in result.files and result.files[rel]["hash"] == current:
+                continue
+            if not weights[rel]:
+                continue
+
+            functions = _parse_functions(file_path)
+            if not functions:
+                continue
+            click.echo(f"Processing {file_path} ...")
+            func_docs = doc_gen.generate_docstrings(functions, file_path)
+            module_md = doc_gen.generate_module_overview(file_path, functions)
+            # What merge will write, so a repeated merge sees its own output
+            merged_hash = text_hash(render_injected(file_path.read_text(encoding="utf-8"), func_docs))
+            result.add(rel, current, merged_hash, functions, func_docs, module_md)
+
+            if count % 10 == 0:
+                result.save()
+    finally:
+        result.save()
+
+    click.echo(doc_gen.dedupe_summary())
+    click.echo(f"Shard results written to {manifest_path}")
+
+
+@cli.command()
+@click.argument("repo", type=click.Path(exists=True, file_okay=False))
+@click.argument("manifests", nargs=-1, type=click.Path(exists=True, dir_okay=False))
+def merge(repo: str, manifests: Tuple[str, ...]):
+    """
+    Merge shard manifests: inject docstrings and write Markdown in one pass.
+
+    Defaults to every manifest in ai_docs/shards/.
+    """
+    repo_path = Path(repo).resolve()
+    paths = [Path(m) for m in manifests] or sorted(
+        (repo_path / DOCS_DIR_NAME / SHARDS_DIR_NAME).glob("shard-*.json")
+    )
+    if not paths:
+        click.echo("No shard manifests found.")
+        return
+
+    loaded = [ShardManifest.load(p) for p in paths]
+    totals = {m.total for m in loaded}
+    seen = {m.shard for m in loaded}
+    if len(totals) == 1:
+        missing = sorted(set(range(1, totals.pop() + 1)) - seen)
+        if missing:
+            click.echo(f"Warning: missing shards {missing}; their files will not be documented.")
+
+    merged = done = stale = 0
+    for rel, entry in iter_manifest_entries(loaded):
+        file_path = repo_path / rel
+        current = file_hash(file_path) if file_path.is_file() else None
+        if current != entry["hash"]:
+            if current is not None and current == entry.get("merged_hash"):
+                done += 1  # merged by an earlier run
+            else:
+                click.echo(f"Skipping {rel} (changed since its shard ran)")
+                stale += 1
+            continue
+
+        func_docs = {int(k): v for k, v in entry["docs"].items()}
+        functions = entry_functions(entry)
+        if func_docs:
+            inject_docstrings_into_file(file_path, func_docs)
+            functions, func_docs = docs_after_injection(file_path, functions, func_docs)
+        write_module_markdown(repo_path, file_path, entry["overview"], functions, func_docs)
+        merged += 1
+
+    click.echo(
+        f"Merged {merged} files from {len(paths)} manifests "
+        f"({done} already merged, {stale} stale)."
+    )
+    _build_docs_site(repo_path)
 
 
 @cli.command()
@@ -94,4 +400,93 @@ def ask(repo: str, question: str, top_k: int):
     assistant = CodebaseAssistant(repo_path)
     resp = assistant.ask(question, top_k=top_k)
     click.echo("\n---- Answer ----\n")
-    click.echo(resp)
\ No newline at end of file
+    click.echo(resp)
+
+BENCH_PROMPTS = [
+    "Write a short Python docstring for:\ndef add(a, b):\n    return a + b",
+    "Explain what a Python context manager is in two sentences.",
+    "Write a short Python docstring for:\ndef read_json(path):\n    return json.loads(Path(path).read_text())",
+]
+
+
+@cli.command()
+@click.option("--backend", "backends", multiple=True, type=click.Choice(sorted(BACKENDS)),
+              help="Backend to benchmark (repeatable, default: hf and onnx).")
+@click.option("--max-new-tokens", type=int, default=64, help="Tokens to generate per prompt.")
+def benchmark(backends: Tuple[str, ...], max_new_tokens: int):
+    """Compare inference backends on load time and tokens/sec."""
+    rows = []
+    for name in backends or ("hf", "onnx"):
+        # One backend failing (e.g. optional deps missing) must not hide the others
+        try:
+            start = time.perf_counter()
+            llm = LLMClient(backend=name)
+            load_s = time.perf_counter() - start
+
+            generated = 0
+            start = time.perf_counter()
+            for prompt in BENCH_PROMPTS:
+                out = llm.generate(prompt, extra_params={"max_new_tokens": max_new_tokens})
+                generated += llm.count_tokens(out)
+            gen_s = time.perf_counter() - start
+        except Exception as e:
+            rows.append((name, None, None, f"{type(e).__name__}: {e}"))
+            continue
+        rows.append((name, load_s, generated / gen_s if gen_s else 0.0, ""))
+
+    click.echo(f"{'backend':<10}{'load (s)':>10}{'tokens/s':>12}")
+    for name, load_s, tps, error in rows:
+        if error:
+            click.echo(f"{name:<10}{'failed':>10}{'-':>12}  {error}")
+        else:
+            click.echo(f"{name:<10}{load_s:>10.2f}{tps:>12.1f}")
+
+
+@cli.command()
+@click.argument("repo", type=click.Path(exists=True, file_okay=False))
+@click.option("--batch-size", type=int, default=8, help="Prompts per batch.")
+@click.option("--limit", type=int, default=64, help="Number of functions to sample.")
+@click.option("--measure", is_flag=True, help="Also run both orders through the model and time them.")
+def schedule_report(repo: str, batch_size: int, limit: int, measure: bool):
+    """Compare length-aware scheduling with file order for docstring batches."""
+    repo_path = Path(repo).resolve()
+    doc_gen = DocGenerator()
+
+    items = []
+    for file_path in iter_python_files(repo_path):
+        for func in extract_functions_from_file(file_path):
+            prompt = doc_gen.docstring_prompt(func)
+            items.append(WorkItem(
+                str(len(items)), prompt, doc_gen.llm.count_tokens(prompt), docstring_budget(func)
+            ))
+        if len(items) >= limit:
+            break
+    items = items[:limit]
+    if not items:
+        click.echo("No functions found.")
+        return
+
+    orders = [
+        ("file order", file_order_batches(items, batch_size)),
+        ("scheduled", plan_batches(items, batch_size)),
+    ]
+    click.echo(f"{len(items)} functions, batch size {batch_size}")
+    click.echo(f"{'order':<12}{'prompt waste':>14}{'budget waste':>14}{'tokens/s':>12}{'time (s)':>10}")
+    for name, batches in orders:
+        stats = padding_stats(batches)
+        tps = elapsed = float("nan")
+        if measure:
+            generated = 0
+            start = time.perf_counter()
+            for batch in batches:
+                outs = doc_gen.llm.generate_batch(
+                    [w.prompt for w in batch],
+                    extra_params={"max_new_tokens": max(w.budget for w in batch)},
+                )
+                generated += sum(doc_gen.llm.count_tokens(o) for o in outs)
+            elapsed = time.perf_counter() - start
+            tps = generated / elapsed if elapsed else 0.0
+        click.echo(
+            f"{name:<12}{stats['prompt_waste']:>14.1%}{stats['output_waste']:>14.1%}"
+            f"{tps:>12.1f}{elapsed:>10.2f}"
+        )
@@ -1,16 +1,60 @@
 import ast
+import hashlib
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 
 from .config import MAX_CODE_CHARS
+from .file_discovery import iter_python_files
+from .symbol_index import extract_file_symbols
 
 
 class FunctionInfo:
-    def __init__(self, name: str, args: List[str], code: str, lineno: int):
+    def __init__(
+        self,
+        name: str,
+        args: List[str],
+        code: str,
+        lineno: int,
+        body_hash: Optional[str] = None,
+        n_lines: Optional[int] = None,
+        n_branches: Optional[int] = None,
+    ):
         self.name = name
         self.args = args
         self.code = code
         self.lineno = lineno  # line number in file
+        self.body_hash = body_hash  # structural hash, equal for identical bodies
+        self.n_lines = n_lines  # untruncated length of the definition
+        self.n_branches = n_branches  # if/loop/try/boolean branch points
+
+
+_BRANCH_NODES = (
+    ast.If, ast.For, ast.AsyncFor, ast.While, ast.Try, ast.ExceptHandler,
+    ast.IfExp, ast.BoolOp, ast.comprehension,
+)
+
+
+def _body_hash(node: ast.FunctionDef) -> str:
+    """
+    Hash the function's AST ignoring its name, existing docstring and
+    positions, so structurally identical functions share a hash.
+    """
+    body = node.body
+    first = body[0] if body else None
+    if (
+        isinstance(first, ast.Expr)
+        and isinstance(first.value, ast.Constant)
+        and isinstance(first.value.value, str)
+    ):
+        body = body[1:]
+
+    saved = node.name, node.body
+    node.name, node.body = "", body
+    try:
+        dump = ast.dump(node)  # positions are excluded by default
+    finally:
+        node.name, node.body = saved
+    return hashlib.sha256(dump.encode()).hexdigest()
 
 
 def extract_functions_from_file(path: Path) -> List[FunctionInfo]:
@@ -18,8 +62,21 @@ def extract_functions_from_file(path: Path) -> List[FunctionInfo]:
     Parse a Python file and extract top-level function definitions.
     """
     source = path.read_text(encoding="utf-8")
+    return _functions_from_tree(ast.parse(source), source)
+
+
+def extract_functions_and_symbols(path: Path) -> Tuple[List[FunctionInfo], Dict[str, List[Any]]]:
+    """
+    Parse a Python file once and return both its functions and its
+    symbols (definitions, calls, imports, class bases).
+    """
+    source = path.read_text(encoding="utf-8")
     tree = ast.parse(source)
+    return _functions_from_tree(tree, source), extract_file_symbols(tree)
+
 
+def _functions_from_tree(tree: ast.AST, source: str) -> List[FunctionInfo]:
+    lines = source.splitlines()
     functions: List[FunctionInfo] = []
 
     for node in ast.walk(tree):
@@ -31,7 +88,6 @@ def extract_functions_from_file(path: Path) -> List[FunctionInfo]:
             )
 
             # Slice the original source by line numbers
-            lines = source.splitlines()
             func_code = "\n".join(lines[start_line - 1 : end_line])
 
             if len(func_code) > MAX_CODE_CHARS:
@@ -44,6 +100,9 @@ def extract_functions_from_file(path: Path) -> List[FunctionInfo]:
                     args=arg_names,
                     code=func_code,
                     lineno=start_line,
+                    body_hash=_body_hash(node),
+                    n_lines=end_line - start_line + 1,
+                    n_branches=sum(isinstance(n, _BRANCH_NODES) for n in ast.walk(node)),
                 )
             )
 
@@ -53,5 +112,8 @@ def extract_functions_from_file(path: Path) -> List[FunctionInfo]:
 def find_python_files(repo_path: Path) -> List[Path]:
     """
     Recursively find all .py files inside a repository.
+
+    Thin list wrapper over iter_python_files; prefer the generator when
+    processing can start before discovery finishes.
     """
-    return [p for p in repo_path.rglob("*.py") if p.is_file()]
+    return list(iter_python_files(repo_path))
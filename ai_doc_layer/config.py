@@ -9,3 +9,18 @@ DOCS_DIR_NAME = "ai_docs"
 
 LOCAL_MODEL_ID = os.getenv("LOCAL_MODEL_ID", "TinyLlama/TinyLlama-1.1B-Chat-v1.0")
 MAX_CODE_CHARS = 4000
+
+# Inference runtime: "hf" (transformers + torch), "onnx" (ONNX Runtime CPU) or "fake" (tests)
+LLM_BACKEND = os.getenv("LLM_BACKEND", "hf")
+ONNX_EXPORT_DIR = os.getenv("ONNX_EXPORT_DIR", ".ai_doc_onnx")
+
+# Directories never descended into during file discovery.
+DEFAULT_EXCLUDE_DIRS = {
+    ".git", ".hg", ".svn", ".tox", ".nox", ".venv",
+    "node_modules", "__pycache__", ".mypy_cache", ".pytest_cache", ".ruff_cache",
+    "site-packages",
+}
+# Generic names skipped only at the repo root, so packages like
+# myproj/build/ are still documented (nested virtualenvs are found by
+# their pyvenv.cfg instead).
+ROOT_EXCLUDE_DIRS = {"venv", "env", "build", "dist", DOCS_DIR_NAME}
@@ -1,9 +1,13 @@
+import hashlib
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 import textwrap
+from concurrent.futures import ThreadPoolExecutor
 
 from .code_parser import FunctionInfo
 from .llm_client import LLMClient
+from .cache import load_from_cache, save_to_cache
+from .scheduler import WorkItem, docstring_budget, plan_batches
 
 
 def sanitize_docstring(raw: str) -> str:
@@ -49,11 +53,160 @@ def sanitize_docstring(raw: str) -> str:
 
 
 class DocGenerator:
-    def __init__(self, llm: Optional[LLMClient] = None):
+    def __init__(
+        self, llm: Optional[LLMClient] = None, max_workers: int = 1, batch_size: int = 1
+    ):
         self.llm = llm or LLMClient()
+        # Concurrent prompts per file; only useful with an InferencePool
+        self.max_workers = max_workers
+        # > 1 switches to length-bucketed batched generation (scheduler.py)
+        self.batch_size = batch_size
+        # body_hash -> docstring, so identical bodies are generated once per run
+        self._by_body: Dict[str, str] = {}
+        self.requested = 0
+        # Persistent entries are only valid for the same prompt template,
+        # model and backend
+        template = self.docstring_prompt(FunctionInfo("", [], "", 0))
+        self._cache_scope = "{}:{}:{}".format(
+            hashlib.sha256(template.encode()).hexdigest()[:12],
+            self.llm.backend.name,
+            self.llm.model_id,
+        )
+
+    @property
+    def unique_generated(self) -> int:
+        return len(self._by_body)
+
+    def dedupe_summary(self) -> str:
+        if not self.requested:
+            return "No docstrings generated."
+        saved = 1 - self.unique_generated / self.requested
+        return (
+            f"Docstrings: {self.requested} functions, {self.unique_generated} unique bodies "
+            f"(dedupe ratio {saved:.1%})."
+        )
 
     def generate_docstring(self, func: FunctionInfo, file_path: Path) -> str:
-        prompt = f"""
+        self.requested += 1
+        if func.body_hash is None:
+            return self._generate_docstring(func, file_path)
+
+        doc = self._by_body.get(func.body_hash)
+        if doc is None:
+            doc = self._generate_docstring(func, file_path)
+            self._by_body[func.body_hash] = doc
+        return doc
+
+    def generate_docstrings(self, functions: List[FunctionInfo], file_path: Path) -> Dict[int, str]:
+        """
+        Generate docstrings for all functions of a file, keyed by lineno.
+        With batch_size > 1 they are batched by length, with max_workers > 1
+        issued concurrently.
+        """
+        if self.batch_size > 1:
+            docs = self.generate_docstrings_scheduled([(f, file_path) for f in functions])
+            return {f.lineno: d for f, d in zip(functions, docs)}
+        if self.max_workers <= 1:
+            return {f.lineno: self.generate_docstring(f, file_path) for f in functions}
+
+        # Resolve duplicates and known bodies here, so only unique bodies fan
+        # out and the counters and memo are touched by this thread alone
+        self.requested += len(functions)
+        by_key: Dict[str, str] = {}
+        todo: Dict[str, FunctionInfo] = {}
+        for f in functions:
+            key = self.body_key(f)
+            if key in by_key or key in todo:
+                continue
+            known = self.known_docstring(f)
+            if known is not None:
+                by_key[key] = known
+            else:
+                todo[key] = f
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            raws = pool.map(lambda f: self._generate_docstring(f, file_path), todo.values())
+            by_key.update(zip(todo, raws))
+        for key, doc in by_key.items():
+            self._by_body[key] = doc
+        return {f.lineno: by_key[self.body_key(f)] for f in functions}
+
+    def generate_docstrings_scheduled(
+        self, items: List[Tuple[FunctionInfo, Path]]
+    ) -> List[str]:
+        """
+        Generate docstrings for (function, file) pairs, possibly spanning
+        many files. Cached and duplicate bodies are resolved first; the
+        rest are bucketed by output budget and prompt length and sent to
+        the LLM in batches of batch_size.
+        """
+        results: List[Optional[str]] = [None] * len(items)
+        pending: Dict[str, List[int]] = {}  # body key -> indices waiting on it
+        work: List[WorkItem] = []
+        funcs: Dict[str, FunctionInfo] = {}  # body key -> first function with it
+
+        for i, (func, file_path) in enumerate(items):
+            self.requested += 1
+            key = self.body_key(func)
+            if key in pending:
+                pending[key].append(i)
+                continue
+
+            known = self.known_docstring(func)
+            if known is not None:
+                results[i] = known
+                continue
+
+            pending[key] = [i]
+            funcs[key] = func
+            prompt = self.docstring_prompt(func)
+            work.append(WorkItem(key, prompt, self.llm.count_tokens(prompt), docstring_budget(func)))
+
+        for batch in plan_batches(work, max(1, self.batch_size)):
+            outs = self.llm.generate_batch(
+                [w.prompt for w in batch],
+                extra_params={"max_new_tokens": max(w.budget for w in batch)},
+            )
+            for w, raw in zip(batch, outs):
+                doc = self.remember_docstring(funcs[w.key], raw)
+                for i in pending[w.key]:
+                    results[i] = doc
+
+        return results
+
+    def body_key(self, func: FunctionInfo) -> str:
+        return func.body_hash or hashlib.sha256(func.code.encode()).hexdigest()
+
+    def known_docstring(self, func: FunctionInfo) -> Optional[str]:
+        """
+        Docstring for an identical body seen this run or in the persistent
+        cache, or None if it still has to be generated.
+        """
+        key = self.body_key(func)
+        if key in self._by_body:
+            return self._by_body[key]
+        cached = load_from_cache(self._cache_key(func))
+        if cached:
+            self._by_body[key] = sanitize_docstring(cached)
+            return self._by_body[key]
+        return None
+
+    def remember_docstring(self, func: FunctionInfo, raw: str) -> str:
+        """
+        Cache raw LLM output for func's body and return the sanitized docstring.
+        """
+        save_to_cache(self._cache_key(func), raw)
+        doc = sanitize_docstring(raw)
+        self._by_body[self.body_key(func)] = doc
+        return doc
+
+    def _cache_key(self, func: FunctionInfo) -> str:
+        # Keyed by body so identical code anywhere in the repo shares an
+        # entry; the budget is part of it since it bounds the output
+        return f"docstring:{self._cache_scope}:{self.body_key(func)}:{docstring_budget(func)}"
+
+    def docstring_prompt(self, func: FunctionInfo) -> str:
+        return f"""
         Write a short Python docstring (max 2–3 sentences) describing ONLY:
 
         - What the function does
@@ -66,18 +219,34 @@ class DocGenerator:
         {func.code}
         """
 
+    def _generate_docstring(self, func: FunctionInfo, file_path: Path) -> str:
+        prompt = self.docstring_prompt(func)
+        budget = docstring_budget(func)
 
-        raw = self.llm.generate_with_cache(
-            prompt,
-            cache_key_extra={"file": file_path.name, "func": func.name},
-            extra_params={"max_new_tokens": 70}
-        )
+        if func.body_hash:
+            raw = self.llm.generate_with_cache(
+                prompt,
+                cache_key=self._cache_key(func),
+                extra_params={"max_new_tokens": budget},
+            )
+        else:
+            raw = self.llm.generate_with_cache(
+                prompt,
+                cache_key_extra={
+                    "file": file_path.name, "func": func.name,
+                    "scope": self._cache_scope, "budget": budget,
+                },
+                extra_params={"max_new_tokens": budget}
+            )
 
         return sanitize_docstring(raw)
 
 
     def generate_commit_summary(self, diff_text: str) -> str:
-        prompt = f"""
+        return self.llm.generate(self.commit_summary_prompt(diff_text))
+
+    def commit_summary_prompt(self, diff_text: str) -> str:
+        return f"""
 You are a senior engineer.
 
 Given this git diff, write a short human-readable summary of what changed and why it might matter.
@@ -86,11 +255,13 @@ Limit to 3-4 bullet points.
 Diff:
 {diff_text}
 """
-        return self.llm.generate(prompt)
 
     def generate_module_overview(self, file_path: Path, functions: List[FunctionInfo]) -> str:
+        return self.llm.generate(self.module_overview_prompt(file_path, functions))
+
+    def module_overview_prompt(self, file_path: Path, functions: List[FunctionInfo]) -> str:
         func_names = ", ".join([f.name for f in functions]) or "No functions found"
-        prompt = f"""
+        return f"""
 You are documenting a Python module named {file_path.name}.
 
 Functions in this file: {func_names}
@@ -102,4 +273,3 @@ Write a short Markdown section explaining:
 
 Keep it under 8 sentences.
 """
-        return self.llm.generate(prompt)
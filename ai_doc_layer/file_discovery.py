@@ -0,0 +1,248 @@
+# file_discovery.py
+import fnmatch
+import os
+import re
+import subprocess
+from pathlib import Path
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+from .config import DEFAULT_EXCLUDE_DIRS, ROOT_EXCLUDE_DIRS
+
+DEFAULT_INCLUDE = ("*.py",)
+
+
+class GitIgnore:
+    """
+    Rules from a single .gitignore file, matched relative to the directory
+    that contains it.
+    """
+
+    def __init__(self, base: str, lines: Sequence[str]):
+        self.base = base  # posix path of the .gitignore dir, relative to repo ("" for root)
+        self.rules: List[Tuple[re.Pattern, bool, bool]] = []  # (regex, negated, dir_only)
+        for line in lines:
+            rule = _compile_gitignore_line(line)
+            if rule is not None:
+                self.rules.append(rule)
+
+    @classmethod
+    def from_file(cls, path: Path, base: str) -> "GitIgnore":
+        try:
+            lines = path.read_text(encoding="utf-8", errors="ignore").splitlines()
+        except OSError:
+            lines = []
+        return cls(base, lines)
+
+    def match(self, rel_path: str, is_dir: bool) -> Optional[bool]:
+        """
+        Return True if ignored, False if explicitly re-included, None if no
+        rule applies. The last matching rule wins, as in git.
+        """
+        if self.base:
+            if not rel_path.startswith(self.base + "/"):
+                return None
+            rel_path = rel_path[len(self.base) + 1 :]
+
+        result = None
+        for regex, negated, dir_only in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.match(rel_path):
+                result = not negated
+        return result
+
+
+def _compile_gitignore_line(line: str) -> Optional[Tuple[re.Pattern, bool, bool]]:
+    line = line.rstrip("\n")
+    if not line.strip() or line.startswith("#"):
+        return None
+    if not line.endswith("\\ "):
+        line = line.rstrip()
+
+    negated = line.startswith("!")
+    if negated:
+        line = line[1:]
+    elif line.startswith("\\"):
+        line = line[1:]
+
+    dir_only = line.endswith("/")
+    line = line.rstrip("/")
+    if not line:
+        return None
+
+    # A slash anywhere but the end anchors the pattern to the .gitignore dir
+    anchored = "/" in line
+    line = line.lstrip("/")
+
+    regex = _translate_glob(line)
+    if not anchored:
+        regex = "(?:.*/)?" + regex
+    return re.compile("^" + regex + "$"), negated, dir_only
+
+
+def _translate_glob(pattern: str) -> str:
+    out = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("/**", i) and i + 3 == n:
+            out.append("/.*")
+            i += 3
+        elif pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+        elif c == "*":
+            out.append("[^/]*")
+            i += 1
+        elif c == "?":
+            out.append("[^/]")
+            i += 1
+        elif c == "[":
+            end = pattern.find("]", i + 1)
+            if end == -1:
+                out.append(re.escape(c))
+                i += 1
+            else:
+                body = pattern[i + 1 : end]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                out.append("[" + body.replace("\\", "\\\\") + "]")
+                i = end + 1
+        elif c == "\\" and i + 1 < n:
+            out.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            out.append(re.escape(c))
+            i += 1
+    return "".join(out)
+
+
+def _is_ignored(ignores: Sequence[GitIgnore], rel_path: str, is_dir: bool) -> bool:
+    ignored = False
+    for gi in ignores:
+        res = gi.match(rel_path, is_dir)
+        if res is not None:
+            ignored = res
+    return ignored
+
+
+def _matches_any(rel_path: str, patterns: Sequence[str]) -> bool:
+    name = rel_path.rsplit("/", 1)[-1]
+    return any(
+        fnmatch.fnmatchcase(rel_path, p) or fnmatch.fnmatchcase(name, p)
+        for p in patterns
+    )
+
+
+def _is_excluded_dir(rel_path: str) -> bool:
+    name = rel_path.rsplit("/", 1)[-1]
+    return name in DEFAULT_EXCLUDE_DIRS or rel_path in ROOT_EXCLUDE_DIRS
+
+
+def iter_python_files(
+    repo_path: Path,
+    include: Optional[Sequence[str]] = None,
+    exclude: Optional[Sequence[str]] = None,
+    use_gitignore: bool = True,
+    tracked_only: bool = False,
+) -> Iterator[Path]:
+    """
+    Lazily yield source files under repo_path in a stable (sorted) order.
+
+    Uses os.scandir and prunes DEFAULT_EXCLUDE_DIRS (ROOT_EXCLUDE_DIRS at
+    the top level only), virtualenvs and anything matched by .gitignore
+    files or the exclude globs. Files must match one of the include globs
+    (default: *.py). With tracked_only the candidate list comes from
+    `git ls-files` instead of a directory walk; that runs right away and
+    raises ValueError if repo_path is not a git work tree.
+    """
+    include = tuple(include) if include else DEFAULT_INCLUDE
+    exclude = tuple(exclude or ())
+
+    if tracked_only:
+        return _iter_tracked_files(repo_path, _git_ls_files(repo_path), include, exclude)
+    return _walk_files(repo_path, include, exclude, use_gitignore)
+
+
+def _walk_files(
+    repo_path: Path, include: Sequence[str], exclude: Sequence[str], use_gitignore: bool
+) -> Iterator[Path]:
+    root = str(repo_path)
+    # Stack of (abs dir, rel posix dir, active .gitignore rules)
+    stack: List[Tuple[str, str, Tuple[GitIgnore, ...]]] = [(root, "", ())]
+
+    while stack:
+        abs_dir, rel_dir, ignores = stack.pop()
+        try:
+            with os.scandir(abs_dir) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            continue
+
+        names = {e.name for e in entries}
+        if rel_dir and "pyvenv.cfg" in names:
+            continue  # a virtualenv that isn't named like one
+
+        if use_gitignore and ".gitignore" in names:
+            ignores = ignores + (
+                GitIgnore.from_file(Path(abs_dir) / ".gitignore", rel_dir),
+            )
+
+        subdirs = []
+        for entry in entries:
+            rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+                is_file = not is_dir and entry.is_file()
+            except OSError:
+                continue
+
+            if is_dir:
+                if _is_excluded_dir(rel) or _matches_any(rel, exclude):
+                    continue
+                if ignores and _is_ignored(ignores, rel, True):
+                    continue
+                subdirs.append((entry.path, rel, ignores))
+            elif is_file:
+                if not _matches_any(rel, include) or _matches_any(rel, exclude):
+                    continue
+                if ignores and _is_ignored(ignores, rel, False):
+                    continue
+                yield Path(entry.path)
+
+        # Reverse so that popping walks subdirectories in sorted order
+        stack.extend(reversed(subdirs))
+
+
+def _git_ls_files(repo_path: Path) -> List[str]:
+    try:
+        out = subprocess.run(
+            ["git", "-C", str(repo_path), "ls-files", "-z", "--cached"],
+            check=True,
+            capture_output=True,
+        ).stdout.decode("utf-8", errors="surrogateescape")
+    except FileNotFoundError:
+        raise ValueError("Listing tracked files needs git, which was not found on PATH.")
+    except subprocess.CalledProcessError as e:
+        detail = e.stderr.decode("utf-8", errors="replace").strip()
+        raise ValueError(f"Cannot list tracked files in {repo_path}: {detail}")
+    return sorted(filter(None, out.split("\0")))
+
+
+def _iter_tracked_files(
+    repo_path: Path, tracked: List[str], include: Sequence[str], exclude: Sequence[str]
+) -> Iterator[Path]:
+    for rel in tracked:
+        parts = rel.split("/")
+        # Prune by parent directory the same way the walk does
+        parents = ("/".join(parts[: i + 1]) for i in range(len(parts) - 1))
+        if any(_is_excluded_dir(d) or _matches_any(d, exclude) for d in parents):
+            continue
+        if not _matches_any(rel, include) or _matches_any(rel, exclude):
+            continue
+        path = repo_path / rel
+        if path.is_file():
+            yield path
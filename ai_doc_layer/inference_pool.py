@@ -0,0 +1,245 @@
+# inference_pool.py
+import itertools
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from .backends import HFBackend, get_backend
+from .config import LLM_BACKEND, LOCAL_MODEL_ID
+from .llm_client import LLMClient
+
+# Seconds between checks that every replica process is still alive
+REPLICA_CHECK_INTERVAL = 1.0
+
+
+def available_cpus() -> List[int]:
+    """
+    CPUs this process may run on.
+    """
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def split_cpus(cpus: Sequence[int], replicas: int) -> List[List[int]]:
+    """
+    Split the available CPUs into `replicas` disjoint, contiguous sets of
+    (nearly) equal size, so neighbouring cores stay on the same replica.
+    """
+    cpus = sorted(cpus)
+    if replicas > len(cpus):
+        raise ValueError(f"Cannot pin {replicas} replicas to {len(cpus)} CPUs.")
+    size, extra = divmod(len(cpus), replicas)
+    out, start = [], 0
+    for i in range(replicas):
+        end = start + size + (1 if i < extra else 0)
+        out.append(cpus[start:end])
+        start = end
+    return out
+
+
+def _replica_main(backend_name, model_id, shared_backend, cpus, requests, results):
+    """
+    Worker process loop: pin to `cpus`, size torch's thread pool to match,
+    then serve (request_id, prompt, params) until a None sentinel.
+    """
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+    try:
+        import torch
+
+        torch.set_num_threads(len(cpus))
+        # Raises RuntimeError if torch already started inter-op work
+        torch.set_num_interop_threads(1)
+    except (ImportError, RuntimeError):
+        pass
+
+    backend = shared_backend
+    if backend is None:
+        backend = get_backend(backend_name)
+        backend.load(model_id)
+
+    while True:
+        item = requests.get()
+        if item is None:
+            break
+        request_id, prompt, params = item
+        try:
+            results.put((request_id, backend.generate(prompt, params), None))
+        except Exception as e:
+            results.put((request_id, None, f"{type(e).__name__}: {e}"))
+
+
+class InferencePool(LLMClient):
+    """
+    Drop-in LLMClient that runs N model replicas in worker processes, each
+    pinned to a disjoint CPU set, and sends every prompt to the replica
+    with the fewest outstanding requests.
+
+    With the hf backend the weights are loaded once in the parent and
+    moved to shared memory, so replicas map the same tensors instead of
+    each holding a copy. Other backends load one copy per replica.
+    """
+
+    def __init__(
+        self,
+        replicas: int,
+        model_id: str = LOCAL_MODEL_ID,
+        backend: Optional[str] = None,
+        cpus: Optional[Sequence[int]] = None,
+    ):
+        import torch.multiprocessing as mp
+
+        self.model_id = model_id
+        self.backend_name = backend or LLM_BACKEND
+        self.cpu_sets = split_cpus(list(available_cpus() if cpus is None else cpus), replicas)
+
+        # Parent-side backend: tokenizer for count_tokens, plus the weights
+        # for hf so replicas can share them; other backends load their own
+        self.backend = get_backend(self.backend_name)
+        shared = None
+        if isinstance(self.backend, HFBackend) and self.backend_name == HFBackend.name:
+            self.backend.load(model_id)
+            self.backend.model.share_memory()
+            shared = self.backend
+        else:
+            self.backend.load_tokenizer(model_id)
+
+        ctx = mp.get_context("spawn")
+        self._results = ctx.Queue()
+        self._queues = []
+        self._procs = []
+        for cpu_set in self.cpu_sets:
+            q = ctx.Queue()
+            p = ctx.Process(
+                target=_replica_main,
+                args=(self.backend_name, model_id, shared, cpu_set, q, self._results),
+                daemon=True,
+            )
+            p.start()
+            self._queues.append(q)
+            self._procs.append(p)
+
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        self._pending: Dict[int, Future] = {}
+        self._owner: Dict[int, int] = {}
+        self._load = [0] * replicas
+        self._dead: Dict[int, str] = {}  # replica -> reason it stopped
+        self._closed = False
+        self._collector = threading.Thread(target=self._collect, daemon=True)
+        self._collector.start()
+
+    # --------------------------------------------------------
+    # Dispatch
+    # --------------------------------------------------------
+    def submit(self, prompt: str, extra_params: Optional[Dict[str, Any]] = None) -> Future:
+        """
+        Queue a prompt on the least-loaded replica; resolves to the raw
+        completion text.
+        """
+        future: Future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("InferencePool is closed.")
+            live = [i for i in range(len(self._load)) if i not in self._dead]
+            if not live:
+                raise RuntimeError(f"All inference replicas have exited: {self._dead}")
+            request_id = next(self._ids)
+            replica = min(live, key=self._load.__getitem__)
+            self._load[replica] += 1
+            self._pending[request_id] = future
+            self._owner[request_id] = replica
+        # Callables (should_stop) cannot cross the process boundary
+        params = {k: v for k, v in self._params(extra_params).items() if not callable(v)}
+        self._queues[replica].put((request_id, self._full_prompt(prompt), params))
+        return future
+
+    def _collect(self) -> None:
+        last_check = time.monotonic()
+        while True:
+            try:
+                item = self._results.get(timeout=REPLICA_CHECK_INTERVAL)
+            except queue.Empty:
+                item = False
+            if item is None:
+                return
+            if time.monotonic() - last_check >= REPLICA_CHECK_INTERVAL:
+                self._fail_dead_replicas()
+                last_check = time.monotonic()
+            if item is False:
+                continue
+
+            request_id, text, error = item
+            with self._lock:
+                future = self._pending.pop(request_id, None)
+                if future is None:
+                    continue  # already failed with its replica
+                self._load[self._owner.pop(request_id)] -= 1
+            if error is None:
+                future.set_result(text)
+            else:
+                future.set_exception(RuntimeError(error))
+
+    def _fail_dead_replicas(self) -> None:
+        """
+        Fail the outstanding requests of replicas whose process has exited
+        (e.g. OOM-killed), so callers do not wait on them forever.
+        """
+        for replica, proc in enumerate(self._procs):
+            if replica in self._dead or proc.is_alive():
+                continue
+            reason = f"replica {replica} exited with code {proc.exitcode}"
+            with self._lock:
+                if self._closed:
+                    return
+                self._dead[replica] = reason
+                orphaned = [rid for rid, owner in self._owner.items() if owner == replica]
+                futures = [self._pending.pop(rid) for rid in orphaned]
+                for rid in orphaned:
+                    del self._owner[rid]
+                self._load[replica] = 0
+            for future in futures:
+                future.set_exception(RuntimeError(f"Inference {reason}."))
+
+    def loads(self) -> List[int]:
+        with self._lock:
+            return list(self._load)
+
+    # --------------------------------------------------------
+    # LLMClient interface
+    # --------------------------------------------------------
+    def generate(self, prompt: str, extra_params: Optional[Dict[str, Any]] = None) -> str:
+        text = self.submit(prompt, extra_params).result()
+        return text.split("Assistant:")[-1].strip()
+
+    def generate_batch(
+        self, prompts: List[str], extra_params: Optional[Dict[str, Any]] = None
+    ) -> List[str]:
+        # Spread the batch across replicas rather than padding it on one
+        futures = [self.submit(p, extra_params) for p in prompts]
+        return [f.result().split("Assistant:")[-1].strip() for f in futures]
+
+    def stream(self, prompt: str, extra_params: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+        yield self.generate(prompt, extra_params)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        for q in self._queues:
+            q.put(None)
+        for p in self._procs:
+            p.join(timeout=30)
+        self._results.put(None)
+        self._collector.join(timeout=5)
+
+    def __enter__(self) -> "InferencePool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
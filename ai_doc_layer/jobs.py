@@ -0,0 +1,213 @@
+# jobs.py
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from .ask_cli import CodebaseAssistant
+from .code_parser import extract_functions_from_file
+from .doc_generator import DocGenerator
+from .file_discovery import iter_python_files
+from .llm_client import LLMClient
+from .site_builder import build_site
+from .writer import docs_after_injection, inject_docstrings_into_file, write_module_markdown
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+    """
+    State of one submitted job. Mutated only by the scheduler's worker;
+    read through JobScheduler.poll, which returns a snapshot.
+    """
+
+    def __init__(self, kind: str, params: Dict[str, Any]):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.params = params
+        self.status = QUEUED
+        self.done = 0
+        self.total = 0
+        self.message = "Queued"
+        self.results: List[Dict[str, Any]] = []
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.cancel_event = threading.Event()
+        self.future: Optional[Future] = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "params": dict(self.params),
+            "status": self.status,
+            "done": self.done,
+            "total": self.total,
+            "message": self.message,
+            "results": list(self.results),
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+        }
+
+
+class JobScheduler:
+    """
+    Process-wide queue that runs jobs one at a time on a single worker
+    thread sharing one loaded model, so concurrent users queue behind each
+    other instead of each loading their own LLMClient.
+    """
+
+    def __init__(self, llm_factory: Callable[[], LLMClient] = LLMClient, max_jobs: int = 200):
+        self._llm_factory = llm_factory
+        self._llm: Optional[LLMClient] = None
+        self._assistants: Dict[Path, CodebaseAssistant] = {}
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ai-doc-job")
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._max_jobs = max_jobs
+
+    # --------------------------------------------------------
+    # Public API
+    # --------------------------------------------------------
+    def submit_docstrings(self, repo_path: Path) -> str:
+        return self._submit("docstrings", {"repo": str(repo_path)}, self._run_docstrings)
+
+    def submit_ask(self, repo_path: Path, question: str, top_k: int = 4) -> str:
+        params = {"repo": str(repo_path), "question": question, "top_k": top_k}
+        return self._submit("ask", params, self._run_ask)
+
+    def poll(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.snapshot() if job else None
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Cancel a queued job immediately, or ask a running one to stop at
+        its next checkpoint (between functions).
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status in FINISHED_STATES:
+                return False
+            job.cancel_event.set()
+            if job.future is not None and job.future.cancel():
+                job.status = CANCELLED
+                job.message = "Cancelled before start"
+            return True
+
+    def jobs(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [j.snapshot() for j in sorted(self._jobs.values(), key=lambda j: -j.created_at)]
+
+    def queue_position(self, job_id: str) -> int:
+        with self._lock:
+            queued = sorted(
+                (j for j in self._jobs.values() if j.status == QUEUED),
+                key=lambda j: j.created_at,
+            )
+            ids = [j.id for j in queued]
+            return ids.index(job_id) + 1 if job_id in ids else 0
+
+    # --------------------------------------------------------
+    # Internals
+    # --------------------------------------------------------
+    def _submit(self, kind: str, params: Dict[str, Any], runner: Callable[[Job], Any]) -> str:
+        job = Job(kind, params)
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+            job.future = self._executor.submit(self._run, job, runner)
+        return job.id
+
+    def _prune(self) -> None:
+        finished = sorted(
+            (j for j in self._jobs.values() if j.status in FINISHED_STATES),
+            key=lambda j: j.created_at,
+        )
+        for job in finished[: max(0, len(self._jobs) - self._max_jobs)]:
+            del self._jobs[job.id]
+
+    def _update(self, job: Job, **fields: Any) -> None:
+        with self._lock:
+            for k, v in fields.items():
+                setattr(job, k, v)
+
+    def _check_cancel(self, job: Job) -> None:
+        if job.cancel_event.is_set():
+            raise JobCancelled()
+
+    def _get_llm(self) -> LLMClient:
+        # Only ever called from the single worker thread
+        if self._llm is None:
+            self._llm = self._llm_factory()
+        return self._llm
+
+    def _run(self, job: Job, runner: Callable[[Job], Any]) -> None:
+        self._update(job, status=RUNNING, message="Loading model" if self._llm is None else "Starting")
+        try:
+            result = runner(job)
+            self._update(job, status=DONE, result=result, message="Completed")
+        except JobCancelled:
+            self._update(job, status=CANCELLED, message="Cancelled")
+        except Exception as e:
+            self._update(job, status=FAILED, error=f"{type(e).__name__}: {e}", message="Failed")
+
+    def _run_docstrings(self, job: Job) -> int:
+        repo = Path(job.params["repo"])
+        doc_gen = DocGenerator(llm=self._get_llm())
+        files = list(iter_python_files(repo))
+        self._update(job, total=len(files))
+
+        for file_index, file_path in enumerate(files, start=1):
+            self._check_cancel(job)
+            functions = extract_functions_from_file(file_path)
+            func_docs = {}
+            for func in functions:
+                self._check_cancel(job)
+                self._update(job, message=f"Processing `{func.name}` in `{file_path.name}`")
+                doc = doc_gen.generate_docstring(func, file_path)
+                func_docs[func.lineno] = doc
+                with self._lock:
+                    job.results.append({"file": str(file_path), "function": func.name, "docstring": doc})
+
+            if functions:
+                inject_docstrings_into_file(file_path, func_docs)
+                functions, func_docs = docs_after_injection(file_path, functions, func_docs)
+                module_md = doc_gen.generate_module_overview(file_path, functions)
+                write_module_markdown(repo, file_path, module_md, functions, func_docs)
+            self._update(job, done=file_index)
+
+        self._update(job, message="Building docs site")
+        build_site(repo)
+        # Files were rewritten, so any cached search index is stale
+        self._assistants.pop(repo.resolve(), None)
+        return len(files)
+
+    def _run_ask(self, job: Job) -> str:
+        repo = Path(job.params["repo"]).resolve()
+        assistant = self._assistants.get(repo)
+        if assistant is None:
+            self._update(job, message="Indexing repository")
+            assistant = CodebaseAssistant(repo, llm=self._get_llm())
+            self._assistants[repo] = assistant
+        elif assistant.index.is_stale(repo):
+            # Answer from the code as it is now; unchanged files are reused
+            self._update(job, message="Re-indexing changed files")
+            assistant.index.build_index(repo)
+        self._check_cancel(job)
+        self._update(job, message="Thinking")
+        return assistant.ask(job.params["question"], top_k=job.params["top_k"])
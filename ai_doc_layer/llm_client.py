@@ -1,25 +1,28 @@
 # llm_client.py
-from typing import Dict, Any, Optional
-import torch
-from transformers import AutoModelForCausalLM, AutoTokenizer
-from .config import LOCAL_MODEL_ID
+from typing import Dict, Any, Iterator, List, Optional, Union
+from .config import LOCAL_MODEL_ID, LLM_BACKEND
 from .cache import load_from_cache, save_to_cache
+from .backends import InferenceBackend, get_backend
 
 class LLMClient:
     """
-    Local HF model with caching and optimized generation speed.
+    Local model with caching and optimized generation speed. The inference
+    runtime is a pluggable backend (see backends.py), chosen by LLM_BACKEND.
     """
 
-    def __init__(self, model_id: str = LOCAL_MODEL_ID):
+    def __init__(
+        self,
+        model_id: str = LOCAL_MODEL_ID,
+        backend: Union[str, InferenceBackend, None] = None,
+    ):
         self.model_id = model_id
-        self.tokenizer = AutoTokenizer.from_pretrained(self.model_id)
-        self.model = AutoModelForCausalLM.from_pretrained(
-            self.model_id,
-            torch_dtype=torch.float16 if torch.cuda.is_available() else torch.float32,
-            device_map="auto" if torch.cuda.is_available() else None,
-        )
+        if isinstance(backend, InferenceBackend):
+            self.backend = backend
+        else:
+            self.backend = get_backend(backend or LLM_BACKEND)
+        self.backend.load(self.model_id)
 
-    def generate(self, prompt: str, extra_params: Optional[Dict[str, Any]] = None) -> str:
+    def _params(self, extra_params: Optional[Dict[str, Any]]) -> Dict[str, Any]:
         params = {
             "max_new_tokens": 80,     # FAST
             "temperature": 0.1,
@@ -28,37 +31,47 @@ class LLMClient:
 
         if extra_params:
             params.update(extra_params)
+        return params
 
-        full_prompt = (
+    def _full_prompt(self, prompt: str) -> str:
+        return (
             "You are an expert Python documentation assistant. "
             "Answer concisely and clearly.\n\n"
             f"User: {prompt}\nAssistant:"
         )
 
-        encoded = self.tokenizer(full_prompt, return_tensors="pt").to(self.model.device)
+    def generate(self, prompt: str, extra_params: Optional[Dict[str, Any]] = None) -> str:
+        text = self.backend.generate(self._full_prompt(prompt), self._params(extra_params))
+        return text.split("Assistant:")[-1].strip()
+
+    def generate_batch(
+        self, prompts: List[str], extra_params: Optional[Dict[str, Any]] = None
+    ) -> List[str]:
+        texts = self.backend.generate_batch(
+            [self._full_prompt(p) for p in prompts], self._params(extra_params)
+        )
+        return [t.split("Assistant:")[-1].strip() for t in texts]
 
-        with torch.no_grad():
-            out = self.model.generate(
-                **encoded,
-                max_new_tokens=params["max_new_tokens"],
-                temperature=params["temperature"],
-                do_sample=params["do_sample"],
-            )
+    def stream(self, prompt: str, extra_params: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+        yield from self.backend.stream(self._full_prompt(prompt), self._params(extra_params))
 
-        text = self.tokenizer.decode(out[0], skip_special_tokens=True)
-        return text.split("Assistant:")[-1].strip()
+    def count_tokens(self, text: str) -> int:
+        return len(self.backend.tokenize(text))
 
     def generate_with_cache(
         self,
         prompt: str,
         cache_key_extra: Optional[Dict[str, Any]] = None,
-        extra_params: Optional[Dict[str, Any]] = None
+        extra_params: Optional[Dict[str, Any]] = None,
+        cache_key: Optional[str] = None,
     ):
-        cached = load_from_cache(prompt, extra=cache_key_extra)
+        # cache_key replaces the prompt in the cache lookup when given
+        key = cache_key or prompt
+        cached = load_from_cache(key, extra=cache_key_extra)
         if cached:
             return cached
 
         resp = self.generate(prompt, extra_params=extra_params)
 
-        save_to_cache(prompt, resp, extra=cache_key_extra)
+        save_to_cache(key, resp, extra=cache_key_extra)
         return resp
@@ -0,0 +1,70 @@
+# scheduler.py
+from typing import Any, Dict, List
+
+from .code_parser import FunctionInfo
+
+MIN_DOC_TOKENS = 32
+MAX_DOC_TOKENS = 128
+
+
+def docstring_budget(func: FunctionInfo) -> int:
+    """
+    Output token budget for a function's docstring, growing with its
+    argument count, body size and branch count.
+    """
+    n_lines = func.n_lines or func.code.count("\n") + 1
+    n_branches = func.n_branches or 0
+    budget = (
+        MIN_DOC_TOKENS
+        + 6 * min(len(func.args), 6)
+        + min(n_lines, 60) // 2
+        + 4 * min(n_branches, 8)
+    )
+    return max(MIN_DOC_TOKENS, min(budget, MAX_DOC_TOKENS))
+
+
+class WorkItem:
+    def __init__(self, key: str, prompt: str, prompt_tokens: int, budget: int):
+        self.key = key
+        self.prompt = prompt
+        self.prompt_tokens = prompt_tokens
+        self.budget = budget
+
+
+def plan_batches(items: List[WorkItem], batch_size: int) -> List[List[WorkItem]]:
+    """
+    Group items into batches of similar output budget and prompt length,
+    so each batch pads little and stops decoding close to when its
+    members are done.
+    """
+    ordered = sorted(items, key=lambda w: (w.budget, w.prompt_tokens))
+    return [ordered[i : i + batch_size] for i in range(0, len(ordered), batch_size)]
+
+
+def file_order_batches(items: List[WorkItem], batch_size: int) -> List[List[WorkItem]]:
+    return [items[i : i + batch_size] for i in range(0, len(items), batch_size)]
+
+
+def padding_stats(batches: List[List[WorkItem]]) -> Dict[str, Any]:
+    """
+    Prompt tokens actually needed vs. tokens processed once every batch is
+    padded to its longest prompt, plus the output budget spent on padding
+    (every member decodes up to the batch's largest budget).
+    """
+    real = padded = budget = budget_padded = 0
+    for batch in batches:
+        longest = max(w.prompt_tokens for w in batch)
+        biggest = max(w.budget for w in batch)
+        real += sum(w.prompt_tokens for w in batch)
+        padded += longest * len(batch)
+        budget += sum(w.budget for w in batch)
+        budget_padded += biggest * len(batch)
+    return {
+        "batches": len(batches),
+        "prompt_tokens": real,
+        "padded_prompt_tokens": padded,
+        "prompt_waste": 1 - real / padded if padded else 0.0,
+        "output_budget": budget,
+        "padded_output_budget": budget_padded,
+        "output_waste": 1 - budget / budget_padded if budget_padded else 0.0,
+    }
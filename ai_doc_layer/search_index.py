@@ -1,10 +1,22 @@
 # search_index.py
 from pathlib import Path
-from typing import List, Tuple
+from typing import Any, Dict, List, Tuple
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import linear_kernel
+import hashlib
+import json
 import os
-from .code_parser import extract_functions_from_file, FunctionInfo
+from .code_parser import extract_functions_and_symbols, FunctionInfo
+from .config import DOCS_DIR_NAME
+from .file_discovery import iter_python_files
+from .symbol_index import SymbolIndex
+
+def snippet_hash(snippet: str) -> str:
+    return hashlib.sha256(snippet.encode()).hexdigest()
+
+
+INDEX_CACHE_NAME = "search_index_cache.json"
+
 
 class SearchIndex:
     def __init__(self):
@@ -13,27 +25,48 @@ class SearchIndex:
         )
         self.docs = []  # list[str]
         self.metadata = []  # list[(path, name, lineno)]
+        self.hashes = []  # list[str], sha256 of each snippet
+        self.locations = {}  # (str path, lineno) -> index into docs
+        self.stamps = {}  # str path -> [mtime_ns, size] at the last build
+        self.symbols = SymbolIndex()
         self.tfidf = None
 
-    def build_index(self, repo_path: Path):
+    def build_index(self, repo_path: Path, persist: bool = True):
+        """
+        Index every function snippet and build the symbol table / call graph
+        from the same parse. Per-file results are persisted under ai_docs/
+        and reused for files whose mtime and size are unchanged.
+        """
         self.docs = []
         self.metadata = []
-        for py in repo_path.rglob("*.py"):
-            if not py.is_file():
-                continue
-            try:
-                funcs = extract_functions_from_file(py)
-            except Exception:
-                # fallback: index whole file
-                text = py.read_text(encoding="utf-8")
-                self.docs.append(text)
-                self.metadata.append((py, "<module>", 1))
-                continue
-
-            for f in funcs:
-                snippet = f"# File: {py}\n# Function: {f.name}\n\n" + (f.code or "")
+        self.locations = {}
+        self.symbols = SymbolIndex(repo_path)
+
+        cache_path = repo_path / DOCS_DIR_NAME / INDEX_CACHE_NAME
+        cached = self._load_file_cache(cache_path) if persist else {}
+        file_cache = {}
+
+        for py in iter_python_files(repo_path):
+            key = str(py)
+            st = py.stat()
+            stamp = [st.st_mtime_ns, st.st_size]
+            entry = cached.get(key)
+            if entry is None or entry["stamp"] != stamp:
+                entry = {"stamp": stamp, **self._parse_file(py)}
+            file_cache[key] = entry
+
+            for name, lineno, snippet in entry["snippets"]:
+                self.locations[(key, lineno)] = len(self.docs)
                 self.docs.append(snippet)
-                self.metadata.append((py, f.name, f.lineno))
+                self.metadata.append((py, name, lineno))
+            self.symbols.add_file(key, entry["symbols"])
+
+        self.stamps = {key: entry["stamp"] for key, entry in file_cache.items()}
+        if persist:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            cache_path.write_text(json.dumps({"files": file_cache}), encoding="utf-8")
+
+        self.hashes = [snippet_hash(d) for d in self.docs]
 
         if not self.docs:
             self.tfidf = None
@@ -41,6 +74,64 @@ class SearchIndex:
 
         self.tfidf = self.vectorizer.fit_transform(self.docs)
 
+    def is_stale(self, repo_path: Path) -> bool:
+        """
+        True if Python files under repo_path were added, removed or
+        modified since the last build_index.
+        """
+        current = {}
+        for py in iter_python_files(repo_path):
+            try:
+                st = py.stat()
+            except OSError:
+                return True
+            current[str(py)] = [st.st_mtime_ns, st.st_size]
+        return current != self.stamps
+
+    def _parse_file(self, py: Path) -> Dict[str, Any]:
+        try:
+            funcs, symbols = extract_functions_and_symbols(py)
+        except Exception:
+            # fallback: index whole file
+            text = py.read_text(encoding="utf-8")
+            return {"snippets": [["<module>", 1, text]], "symbols": {}}
+
+        snippets = [
+            [f.name, f.lineno, f"# File: {py}\n# Function: {f.name}\n\n" + (f.code or "")]
+            for f in funcs
+        ]
+        return {"snippets": snippets, "symbols": symbols}
+
+    def _load_file_cache(self, cache_path: Path) -> Dict[str, Any]:
+        if not cache_path.exists():
+            return {}
+        try:
+            return json.loads(cache_path.read_text("utf-8")).get("files", {})
+        except ValueError:
+            return {}
+
+    def neighbors(self, path: Path, lineno: int, limit: int = 2) -> List[Tuple[Tuple[Path,str,int], str, str]]:
+        """
+        Direct callers and callees of the function at path:lineno that are
+        in the index, as ((path, func_name, lineno), relation, snippet_text).
+        """
+        key = str(path)
+        out = []
+        for relation, locs in (
+            ("caller", self.symbols.callers_of(key, lineno)),
+            ("callee", self.symbols.callees_of(key, lineno)),
+        ):
+            found = 0
+            for loc in locs:
+                idx = self.locations.get(loc)
+                if idx is None or loc == (key, lineno):
+                    continue
+                out.append((self.metadata[idx], relation, self.docs[idx]))
+                found += 1
+                if found >= limit:
+                    break
+        return out
+
     def query(self, q: str, top_k: int = 5) -> List[Tuple[Tuple[Path,str,int], float, str]]:
         """
         Returns list of ((path, func_name, lineno), score, snippet_text)
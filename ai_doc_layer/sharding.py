@@ -0,0 +1,117 @@
+# sharding.py
+import heapq
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Tuple
+
+from .code_parser import FunctionInfo
+from .config import DOCS_DIR_NAME
+
+SHARDS_DIR_NAME = "shards"
+
+
+def parse_shard_spec(spec: str) -> Tuple[int, int]:
+    """
+    Parse "i/n" (1-based shard i of n) into (i, n).
+    """
+    try:
+        i_str, n_str = spec.split("/")
+        i, n = int(i_str), int(n_str)
+    except ValueError:
+        raise ValueError(f"Invalid shard spec {spec!r}, expected 'i/n' (e.g. 1/4).")
+    if n < 1 or not 1 <= i <= n:
+        raise ValueError(f"Invalid shard spec {spec!r}, need 1 <= i <= n.")
+    return i, n
+
+
+def assign_shards(weights: Dict[str, int], n: int) -> Dict[str, int]:
+    """
+    Deterministically map each relative file path to a 1-based shard.
+
+    Files are placed heaviest first onto the currently lightest shard
+    (ties broken by path and shard number), so every worker computes the
+    same assignment from the same file set and shards end up balanced
+    by function count.
+    """
+    heap = [(0, shard) for shard in range(1, n + 1)]
+    assignment: Dict[str, int] = {}
+    # Every file costs at least 1 so function-less modules still spread out
+    for rel, weight in sorted(weights.items(), key=lambda kv: (-kv[1], kv[0])):
+        load, shard = heapq.heappop(heap)
+        assignment[rel] = shard
+        heapq.heappush(heap, (load + max(weight, 1), shard))
+    return assignment
+
+
+def default_manifest_path(repo_path: Path, shard: int, total: int) -> Path:
+    return repo_path / DOCS_DIR_NAME / SHARDS_DIR_NAME / f"shard-{shard}-of-{total}.json"
+
+
+class ShardManifest:
+    """
+    Portable results of one shard: generated docstrings and module
+    overviews keyed by repo-relative path, plus the source hash they were
+    generated from and the hash the file will have once merged. Nothing is
+    written into the source tree until `merge`.
+    """
+
+    def __init__(self, path: Path, shard: int = 0, total: int = 0):
+        self.path = path
+        self.shard = shard
+        self.total = total
+        self.files: Dict[str, Dict[str, Any]] = {}
+
+    @classmethod
+    def load(cls, path: Path) -> "ShardManifest":
+        data = json.loads(path.read_text("utf-8"))
+        manifest = cls(path, data.get("shard", 0), data.get("total", 0))
+        manifest.files = data.get("files", {})
+        return manifest
+
+    def add(
+        self,
+        rel: str,
+        source_hash: str,
+        merged_hash: str,
+        functions: List[FunctionInfo],
+        func_docs: Dict[int, str],
+        module_overview: str,
+    ) -> None:
+        self.files[rel] = {
+            "hash": source_hash,
+            "merged_hash": merged_hash,
+            "functions": [
+                {"name": f.name, "args": f.args, "lineno": f.lineno} for f in functions
+            ],
+            "docs": {str(k): v for k, v in func_docs.items()},
+            "overview": module_overview,
+        }
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {"shard": self.shard, "total": self.total, "files": self.files}
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps(data, indent=2), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+def iter_manifest_entries(
+    manifests: Iterable[ShardManifest],
+) -> Iterable[Tuple[str, Dict[str, Any]]]:
+    """
+    Yield (rel, entry) over all manifests in path order. If the same file
+    appears in several manifests the last one read wins.
+    """
+    merged: Dict[str, Dict[str, Any]] = {}
+    for manifest in manifests:
+        merged.update(manifest.files)
+    for rel in sorted(merged):
+        yield rel, merged[rel]
+
+
+def entry_functions(entry: Dict[str, Any]) -> List[FunctionInfo]:
+    return [
+        FunctionInfo(name=f["name"], args=f["args"], code="", lineno=f["lineno"])
+        for f in entry.get("functions", [])
+    ]
@@ -0,0 +1,242 @@
+# site_builder.py
+import hashlib
+import html
+import json
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from .config import DOCS_DIR_NAME
+from .writer import MODULE_RECORDS_DIR_NAME
+
+SITE_DIR_NAME = "site"
+BUILD_MANIFEST = ".build-manifest.json"
+# Bump when templates change so every page is rebuilt once
+TEMPLATE_VERSION = "1"
+
+STYLE = """
+body{font-family:system-ui,sans-serif;max-width:960px;margin:2rem auto;padding:0 1rem;color:#222}
+a{color:#3558c4;text-decoration:none}a:hover{text-decoration:underline}
+nav{font-size:.9rem;margin-bottom:1rem}code{background:#f3f3f6;padding:0 .2rem}
+.fn{border-left:3px solid #8888ff;padding:.2rem .8rem;margin:1rem 0}
+.muted{color:#777}#results li{margin:.2rem 0}
+input[type=search]{width:100%;padding:.4rem;font-size:1rem}
+"""
+
+SEARCH_JS = """
+(function(){
+  var root = document.currentScript.getAttribute('data-root');
+  var box = document.getElementById('search'), out = document.getElementById('results');
+  function tokens(q){ return q.toLowerCase().split(/[^a-z0-9]+/).filter(function(t){return t.length>1;}); }
+  box.addEventListener('input', function(){
+    var idx = window.SEARCH_INDEX, qs = tokens(box.value), scores = {};
+    out.innerHTML = '';
+    if(!qs.length) return;
+    var terms = Object.keys(idx.terms);
+    qs.forEach(function(q, n){
+      var hit = {};
+      terms.forEach(function(t){ if(t.indexOf(q)===0) idx.terms[t].forEach(function(d){ hit[d]=(hit[d]||0)+(t===q?2:1); }); });
+      Object.keys(hit).forEach(function(d){
+        if(n===0) scores[d]=hit[d]; else if(d in scores) scores[d]+=hit[d];
+      });
+      Object.keys(scores).forEach(function(d){ if(!(d in hit)) delete scores[d]; });
+    });
+    Object.keys(scores).sort(function(a,b){return scores[b]-scores[a];}).slice(0,25).forEach(function(d){
+      var doc = idx.docs[d], li = document.createElement('li'), a = document.createElement('a');
+      a.href = root + doc[1]; a.textContent = doc[0];
+      li.appendChild(a); li.appendChild(document.createTextNode(' \\u2014 ' + doc[2] + ' ' + doc[3]));
+      out.appendChild(li);
+    });
+  });
+})();
+"""
+
+
+def _slug(rel: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", rel) or "_root"
+
+
+def _package_of(module: str) -> str:
+    return module.rsplit("/", 1)[0] if "/" in module else ""
+
+
+def _summary(text: str, limit: int = 160) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[: limit - 1] + "…"
+
+
+def _page(title: str, root: str, body: str) -> str:
+    return (
+        "<!doctype html><html><head><meta charset='utf-8'>"
+        f"<title>{html.escape(title)}</title>"
+        f"<link rel='stylesheet' href='{root}assets/style.css'></head><body>"
+        f"<nav><a href='{root}index.html'>Index</a></nav>"
+        "<input type='search' id='search' placeholder='Search functions and modules'>"
+        "<ul id='results'></ul>"
+        f"{body}"
+        f"<script src='{root}search_index.js'></script>"
+        f"<script src='{root}assets/search.js' data-root='{root}'></script>"
+        "</body></html>"
+    )
+
+
+def _paragraphs(text: str) -> str:
+    parts = [p.strip() for p in re.split(r"\n\s*\n", text or "") if p.strip()]
+    return "".join(f"<p>{html.escape(p)}</p>" for p in parts)
+
+
+def load_module_records(docs_root: Path) -> List[Dict[str, Any]]:
+    records_dir = docs_root / MODULE_RECORDS_DIR_NAME
+    if not records_dir.is_dir():
+        return []
+    records = [json.loads(p.read_text("utf-8")) for p in sorted(records_dir.glob("*.json"))]
+    return sorted(records, key=lambda r: r["module"])
+
+
+def _module_page(record: Dict[str, Any]) -> str:
+    module = record["module"]
+    pkg = _package_of(module)
+    root = "../"
+    body = [
+        f"<nav><a href='{root}packages/{_slug(pkg)}.html'>{html.escape(pkg or '(top level)')}</a>"
+        f" / {html.escape(module)}</nav>",
+        f"<h1><code>{html.escape(module)}</code></h1>",
+        "<h2>Module Overview</h2>",
+        _paragraphs(record.get("overview", "")),
+        "<h2>Functions</h2>",
+    ]
+    for fn in record.get("functions", []):
+        anchor = f"{fn['name']}-{fn['lineno']}"
+        sig = f"{fn['name']}({', '.join(fn['args'])})"
+        doc = fn.get("docstring") or "No docstring generated."
+        body.append(
+            f"<div class='fn' id='{html.escape(anchor)}'><h3><code>{html.escape(sig)}</code>"
+            f" <span class='muted'>line {fn['lineno']}</span></h3>{_paragraphs(doc)}</div>"
+        )
+    return _page(module, root, "".join(body))
+
+
+def _package_page(pkg: str, records: List[Dict[str, Any]]) -> str:
+    root = "../"
+    items = "".join(
+        f"<li><a href='{root}modules/{_slug(r['module'])}.html'>{html.escape(r['module'])}</a>"
+        f" <span class='muted'>{html.escape(_summary(r.get('overview', '')))}</span></li>"
+        for r in records
+    )
+    title = pkg or "(top level)"
+    return _page(title, root, f"<h1>{html.escape(title)}</h1><ul>{items}</ul>")
+
+
+def _index_page(packages: Dict[str, List[Dict[str, Any]]]) -> str:
+    items = "".join(
+        f"<li><a href='packages/{_slug(pkg)}.html'>{html.escape(pkg or '(top level)')}</a>"
+        f" <span class='muted'>{len(recs)} modules</span></li>"
+        for pkg, recs in sorted(packages.items())
+    )
+    return _page("Documentation", "", f"<h1>Documentation</h1><ul>{items}</ul>")
+
+
+def _terms(*texts: str) -> List[str]:
+    words = set()
+    for text in texts:
+        for w in re.split(r"[^A-Za-z0-9]+", text or ""):
+            if len(w) > 1:
+                words.add(w.lower())
+    return sorted(words)
+
+
+def build_search_index(records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Compact inverted index: docs are [title, url, kind, summary] rows and
+    terms map each lowercase word to the ids of the docs containing it.
+    """
+    docs: List[List[str]] = []
+    terms: Dict[str, List[int]] = {}
+
+    def add(title: str, url: str, kind: str, summary: str, words: List[str]) -> None:
+        doc_id = len(docs)
+        docs.append([title, url, kind, summary])
+        for w in words:
+            terms.setdefault(w, []).append(doc_id)
+
+    for r in records:
+        module = r["module"]
+        page = f"modules/{_slug(module)}.html"
+        add(module, page, "module", _summary(r.get("overview", ""), 80),
+            _terms(module, r.get("overview", "")))
+        for fn in r.get("functions", []):
+            add(f"{fn['name']}()", f"{page}#{fn['name']}-{fn['lineno']}", "function",
+                _summary(fn.get("docstring", ""), 80),
+                _terms(fn["name"], fn.get("docstring", ""), module))
+
+    return {"docs": docs, "terms": terms}
+
+
+def build_site(repo_path: Path) -> Tuple[int, int, int]:
+    """
+    Build the static docs site under ai_docs/site from the module records,
+    rewriting only pages whose inputs changed since the last build.
+
+    Returns (written, unchanged, removed) page counts.
+    """
+    docs_root = repo_path / DOCS_DIR_NAME
+    site_root = docs_root / SITE_DIR_NAME
+    # Skip records of modules that were deleted since they were written
+    records = [
+        r for r in load_module_records(docs_root) if (repo_path / r["module"]).is_file()
+    ]
+
+    packages: Dict[str, List[Dict[str, Any]]] = {}
+    for r in records:
+        packages.setdefault(_package_of(r["module"]), []).append(r)
+
+    search_json = json.dumps(build_search_index(records), separators=(",", ":"))
+
+    # page path -> (input used for change detection, renderer)
+    pages: Dict[str, Tuple[Any, Any]] = {
+        "assets/style.css": (STYLE, lambda: STYLE),
+        "assets/search.js": (SEARCH_JS, lambda: SEARCH_JS),
+        "search_index.json": (search_json, lambda: search_json),
+        "search_index.js": (search_json, lambda: f"window.SEARCH_INDEX={search_json};"),
+        "index.html": (
+            {p: len(rs) for p, rs in packages.items()},
+            lambda: _index_page(packages),
+        ),
+    }
+    for pkg, recs in packages.items():
+        pkg_input = [(r["module"], _summary(r.get("overview", ""))) for r in recs]
+        pages[f"packages/{_slug(pkg)}.html"] = (pkg_input, lambda p=pkg, rs=recs: _package_page(p, rs))
+    for r in records:
+        pages[f"modules/{_slug(r['module'])}.html"] = (r, lambda rec=r: _module_page(rec))
+
+    manifest_path = site_root / BUILD_MANIFEST
+    try:
+        previous = json.loads(manifest_path.read_text("utf-8"))
+    except (OSError, ValueError):
+        previous = {}
+
+    current: Dict[str, str] = {}
+    written = unchanged = 0
+    for rel, (inputs, render) in pages.items():
+        digest = hashlib.sha256(
+            (TEMPLATE_VERSION + json.dumps(inputs, sort_keys=True)).encode()
+        ).hexdigest()
+        current[rel] = digest
+        out = site_root / rel
+        if previous.get(rel) == digest and out.exists():
+            unchanged += 1
+            continue
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text(render(), encoding="utf-8")
+        written += 1
+
+    removed = 0
+    for rel in set(previous) - set(current):
+        stale = site_root / rel
+        if stale.exists():
+            stale.unlink()
+            removed += 1
+
+    site_root.mkdir(parents=True, exist_ok=True)
+    manifest_path.write_text(json.dumps(current, indent=2, sort_keys=True), encoding="utf-8")
+    return written, unchanged, removed
@@ -0,0 +1,231 @@
+# symbol_index.py
+import ast
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+MODULE_SCOPE = "<module>"
+MAX_AMBIGUOUS_DEFS = 3
+
+
+class _SymbolVisitor(ast.NodeVisitor):
+    """
+    Collects definitions, calls, imports and class bases of one module.
+    Calls are attributed to the innermost enclosing function or class.
+    """
+
+    def __init__(self):
+        self.defs: List[List[Any]] = []  # [qualname, name, kind, lineno]
+        self.calls: List[List[Any]] = []  # [caller qualname, caller lineno, callee name, lineno]
+        self.imports: List[List[Any]] = []  # [module, name, alias, lineno]
+        self.bases: List[List[Any]] = []  # [class qualname, [base names]]
+        self._scope: List[Tuple[str, int, str]] = []  # (qualname, lineno, kind)
+
+    def _qualname(self, name: str) -> str:
+        return f"{self._scope[-1][0]}.{name}" if self._scope else name
+
+    def _visit_def(self, node, kind: str) -> None:
+        qualname = self._qualname(node.name)
+        if kind == "function" and self._scope and self._scope[-1][2] == "class":
+            kind = "method"
+        self.defs.append([qualname, node.name, kind, node.lineno])
+        self._scope.append((qualname, node.lineno, kind))
+        self.generic_visit(node)
+        self._scope.pop()
+
+    def visit_FunctionDef(self, node: ast.FunctionDef) -> None:
+        self._visit_def(node, "function")
+
+    def visit_AsyncFunctionDef(self, node: ast.AsyncFunctionDef) -> None:
+        self._visit_def(node, "function")
+
+    def visit_ClassDef(self, node: ast.ClassDef) -> None:
+        self.bases.append([self._qualname(node.name), [_dotted(b) for b in node.bases if _dotted(b)]])
+        self._visit_def(node, "class")
+
+    def visit_Call(self, node: ast.Call) -> None:
+        callee = _dotted(node.func)
+        if callee:
+            caller, caller_line = (self._scope[-1][0], self._scope[-1][1]) if self._scope else (MODULE_SCOPE, 0)
+            self.calls.append([caller, caller_line, callee.rsplit(".", 1)[-1], node.lineno])
+        self.generic_visit(node)
+
+    def visit_Import(self, node: ast.Import) -> None:
+        for alias in node.names:
+            self.imports.append([alias.name, "", alias.asname or "", node.lineno])
+
+    def visit_ImportFrom(self, node: ast.ImportFrom) -> None:
+        module = "." * node.level + (node.module or "")
+        for alias in node.names:
+            self.imports.append([module, alias.name, alias.asname or "", node.lineno])
+
+
+def _dotted(node: ast.AST) -> Optional[str]:
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        parent = _dotted(node.value)
+        return f"{parent}.{node.attr}" if parent else node.attr
+    return None
+
+
+def extract_file_symbols(tree: ast.AST) -> Dict[str, List[Any]]:
+    """
+    Symbols of one parsed module, as plain lists so they can be persisted.
+    """
+    visitor = _SymbolVisitor()
+    visitor.visit(tree)
+    return {
+        "defs": visitor.defs,
+        "calls": visitor.calls,
+        "imports": visitor.imports,
+        "bases": visitor.bases,
+    }
+
+
+Location = Tuple[str, int]  # (path, lineno)
+
+_NAME = r"`?(?P<name>[A-Za-z_][\w.]*)(\(\))?`?"
+# Whole-question patterns (trailing "?" stripped); the captured name is the
+# one the keyword refers to
+_LOOKUP_PATTERNS = [
+    (kind, re.compile(p.replace("NAME", _NAME), re.IGNORECASE))
+    for kind, p in [
+        ("calls", r"(where|from where) (is|are) NAME (called|used|referenced|invoked)"),
+        ("calls", r"(who|what|which functions) (calls|uses|references) NAME"),
+        ("calls", r"((find|show|list) )?(all )?(the )?(callers|usages|references|call sites) (of|for|to) NAME"),
+        ("subclasses", r"(what|which classes) (subclass|subclasses|inherits? from|extends?|derives? from) NAME"),
+        ("subclasses", r"((find|show|list) )?(all )?(the )?subclasses of NAME"),
+        ("imports", r"(where|which files) (is )?NAME (is )?imported"),
+        ("imports", r"(who|what|which files|which modules) imports? NAME"),
+        ("defs", r"(where|in which file) (is|are) NAME( (defined|declared|implemented))?"),
+        ("defs", r"where's NAME( (defined|declared|implemented))?"),
+        ("defs", r"((find|show) )?(the )?definition of NAME"),
+    ]
+]
+
+
+class SymbolIndex:
+    """
+    Repo-wide symbol table and call graph assembled from per-file symbols.
+    Calls are resolved by simple name, so `self.save()` and `save()` both
+    link to every definition named `save`.
+    """
+
+    def __init__(self, repo_path: Optional[Path] = None):
+        self.repo_path = repo_path
+        self.definitions: Dict[str, List[Dict[str, Any]]] = {}  # name -> defs
+        self.references: Dict[str, List[Dict[str, Any]]] = {}  # callee name -> call sites
+        self.callees: Dict[Location, List[str]] = {}  # caller location -> callee names
+        self.importers: Dict[str, List[Dict[str, Any]]] = {}  # imported name -> import sites
+        self.subclasses: Dict[str, List[Dict[str, Any]]] = {}  # base name -> classes
+        self._names: Dict[Location, str] = {}  # definition location -> name
+
+    def add_file(self, path: str, symbols: Dict[str, List[Any]]) -> None:
+        for qualname, name, kind, lineno in symbols.get("defs", []):
+            self.definitions.setdefault(name, []).append(
+                {"path": path, "qualname": qualname, "kind": kind, "lineno": lineno}
+            )
+            self._names[(path, lineno)] = name
+        for caller, caller_line, callee, lineno in symbols.get("calls", []):
+            self.references.setdefault(callee, []).append(
+                {"path": path, "caller": caller, "caller_lineno": caller_line, "lineno": lineno}
+            )
+            names = self.callees.setdefault((path, caller_line), [])
+            if callee not in names:
+                names.append(callee)
+        for module, name, alias, lineno in symbols.get("imports", []):
+            for key in {module.rsplit(".", 1)[-1], name, alias} - {""}:
+                self.importers.setdefault(key, []).append(
+                    {"path": path, "module": module, "name": name, "lineno": lineno}
+                )
+        for qualname, bases in symbols.get("bases", []):
+            for base in bases:
+                self.subclasses.setdefault(base.rsplit(".", 1)[-1], []).append(
+                    {"path": path, "qualname": qualname}
+                )
+
+    # --------------------------------------------------------
+    # Graph lookups
+    # --------------------------------------------------------
+    def callers_of(self, path: str, lineno: int) -> List[Location]:
+        """
+        Locations of functions that call the function defined at path:lineno.
+        """
+        name = self._names.get((path, lineno))
+        if name is None:
+            return []
+        out: List[Location] = []
+        for ref in self.references.get(name, []):
+            loc = (ref["path"], ref["caller_lineno"])
+            if ref["caller_lineno"] and loc not in out:
+                out.append(loc)
+        return out
+
+    def callees_of(self, path: str, lineno: int) -> List[Location]:
+        """
+        Definitions called from the function at path:lineno, preferring
+        definitions in the same file when a name is ambiguous.
+        """
+        out: List[Location] = []
+        for name in self.callees.get((path, lineno), []):
+            defs = self.definitions.get(name, [])
+            local = [d for d in defs if d["path"] == path]
+            if not local and len(defs) > MAX_AMBIGUOUS_DEFS:
+                continue  # a common name like `get`; linking them all is noise
+            for d in local or defs:
+                loc = (d["path"], d["lineno"])
+                if loc not in out:
+                    out.append(loc)
+        return out
+
+    # --------------------------------------------------------
+    # Direct answers
+    # --------------------------------------------------------
+    def answer(self, question: str, limit: int = 20) -> Optional[str]:
+        """
+        Answer pure lookup questions ("where is `foo` called?", "who calls
+        foo?") from the index alone. Anything else, including lookups with
+        extra clauses, returns None so it goes through retrieval.
+        """
+        q = re.sub(r"\s+", " ", question.strip()).rstrip("?!. ")
+        for kind, pattern in _LOOKUP_PATTERNS:
+            m = pattern.fullmatch(q)
+            if m is None:
+                continue
+            return self._lookup(kind, m.group("name").rsplit(".", 1)[-1], limit)
+        return None
+
+    def _lookup(self, kind: str, name: str, limit: int) -> Optional[str]:
+        if kind == "calls":
+            sites = self.references.get(name, [])
+            lines = [f"- {self._rel(s['path'])}:{s['lineno']} in `{s['caller']}`" for s in sites]
+            header = f"`{name}` is called from {len(sites)} place(s):"
+        elif kind == "subclasses":
+            subs = self.subclasses.get(name, [])
+            lines = [f"- `{s['qualname']}` in {self._rel(s['path'])}" for s in subs]
+            header = f"`{name}` has {len(subs)} subclass(es):"
+        elif kind == "imports":
+            sites = self.importers.get(name, [])
+            lines = [f"- {self._rel(s['path'])}:{s['lineno']} ({s['module']})" for s in sites]
+            header = f"`{name}` is imported in {len(sites)} place(s):"
+        else:
+            defs = self.definitions.get(name, [])
+            lines = [f"- {self._rel(d['path'])}:{d['lineno']} ({d['kind']} `{d['qualname']}`)" for d in defs]
+            header = f"`{name}` is defined in {len(defs)} place(s):"
+        if not lines:
+            return None  # retrieval does better than answering "0 place(s)"
+        return self._format(header, lines, limit)
+
+    def _rel(self, path: str) -> str:
+        if self.repo_path is not None:
+            try:
+                return str(Path(path).relative_to(self.repo_path))
+            except ValueError:
+                pass
+        return path
+
+    def _format(self, header: str, lines: List[str], limit: int) -> str:
+        if len(lines) > limit:
+            lines = lines[:limit] + [f"- ... and {len(lines) - limit} more"]
+        return "\n".join([header] + lines)
@@ -4,6 +4,8 @@ from pathlib import Path
 from typing import List, Tuple, Dict
 import pydot
 
+from .file_discovery import iter_python_files
+
 def parse_module(path: Path) -> Dict:
     src = path.read_text(encoding="utf-8")
     tree = ast.parse(src)
@@ -47,7 +49,7 @@ def generate_repo_uml(repo_path: Path, out_dir: Path, render_png: bool = True):
     out_dir.mkdir(parents=True, exist_ok=True)
     modules = []
 
-    for py in repo_path.rglob("*.py"):
+    for py in iter_python_files(repo_path):
         try:
             mi = parse_module(py)
             if not mi["classes"] and not mi["functions"]:
@@ -3,6 +3,8 @@ from pathlib import Path
 import ast
 import pydot
 
+from .file_discovery import iter_python_files
+
 
 class UMLGenerator:
     """
@@ -83,7 +85,7 @@ class UMLGenerator:
     def generate(self, repo: Path, out_png: Path):
 
         # STEP 1 — Parse ALL FILES FIRST
-        for py_file in repo.rglob("*.py"):
+        for py_file in iter_python_files(repo):
             self._parse_file(py_file)
 
         # STEP 2 — Build UML diagram
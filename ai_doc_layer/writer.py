@@ -1,35 +1,56 @@
+import ast
+import json
+import os
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 
-from .code_parser import FunctionInfo
+from .code_parser import FunctionInfo, extract_functions_from_file
 from .config import DOCS_DIR_NAME
 
+# Per-module JSON records under ai_docs/, the input of the docs site build
+MODULE_RECORDS_DIR_NAME = "_modules"
+
 
 def inject_docstrings_into_file(
     file_path: Path,
     func_docs: Dict[int, str],  # lineno -> docstring text
 ) -> None:
     """
-    Insert docstrings right after 'def' line for each function.
+    Insert docstrings into the functions of file_path, in place.
+    """
+    source = file_path.read_text(encoding="utf-8")
+    write_source(file_path, render_injected(source, func_docs))
 
-    Assumes each value in func_docs is a complete, valid triple-quoted
-    docstring string. Indents the docstring to one level deeper than
-    the function definition.
+
+def render_injected(source: str, func_docs: Dict[int, str]) -> str:
     """
-    lines = file_path.read_text(encoding="utf-8").splitlines()
+    Return source with docstrings inserted as the first statement of each
+    function (keyed by its 'def' line), skipping functions that already
+    have a docstring. Positions come from the AST, so multi-line
+    signatures and one-line defs stay valid.
 
-    # Sort by line number descending so indexes stay valid when inserting.
+    Assumes each value in func_docs is a complete, valid triple-quoted
+    docstring string.
+    """
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return source
+    nodes = {
+        node.lineno: node for node in ast.walk(tree)
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))
+    }
+    lines = source.splitlines()
+
+    # Bottom-up so earlier line indexes stay valid while inserting
     for lineno in sorted(func_docs.keys(), reverse=True):
-        def_index = lineno - 1  # 0-based index of the 'def' line
-        raw_doc = func_docs[lineno]
-
-        # Indent level of the function definition
-        def_indent = _get_indent(lines[def_index])
-        # Body indent: one extra level (4 spaces) relative to def
-        body_indent = def_indent + " " * 4
+        node = nodes.get(lineno)
+        if node is None or ast.get_docstring(node, clean=False) is not None:
+            continue
+        def_indent = _get_indent(lines[node.lineno - 1])
 
         # Normalize docstring: strip outer whitespace, split into lines
-        doc_lines = raw_doc.strip().splitlines()
+        doc_lines = func_docs[lineno].strip().splitlines()
 
         # Ensure docstring starts and ends with triple quotes
         if not doc_lines[0].lstrip().startswith('"""'):
@@ -37,25 +58,92 @@ def inject_docstrings_into_file(
         if not doc_lines[-1].rstrip().endswith('"""'):
             doc_lines[-1] = doc_lines[-1].rstrip() + '"""'
 
-        # Apply body indentation to every docstring line
-        indented_doc_lines = [body_indent + line.lstrip() for line in doc_lines]
-
-        insert_pos = def_index + 1  # insert after the def line
-        lines[insert_pos:insert_pos] = indented_doc_lines
-
-    file_path.write_text("\n".join(lines), encoding="utf-8")
+        first = node.body[0]
+        row = lines[first.lineno - 1]
+        # ast column offsets count UTF-8 bytes
+        split = len(row.encode("utf-8")[: first.col_offset].decode("utf-8", errors="ignore"))
+        head, tail = row[:split].rstrip(), row[split:]
+        if head.endswith(":"):
+            # Body shares the line with the signature: move it below the docstring
+            body_indent = def_indent + ("\t" if def_indent.startswith("\t") else " " * 4)
+            lines[first.lineno - 1 : first.lineno] = (
+                [head] + [body_indent + line.lstrip() for line in doc_lines] + [body_indent + tail]
+            )
+        else:
+            # Above the first statement, or above its decorators
+            first_line = min([first.lineno] + [d.lineno for d in getattr(first, "decorator_list", [])])
+            body_indent = _get_indent(lines[first_line - 1])
+            lines[first_line - 1 : first_line - 1] = [body_indent + line.lstrip() for line in doc_lines]
+
+    text = "\n".join(lines)
+    return text + "\n" if source.endswith("\n") else text
+
+
+def write_source(file_path: Path, text: str) -> None:
+    # Write atomically so an interrupted run never leaves a half-injected
+    # file; bytes, so the file hashes exactly like checkpoint.text_hash(text)
+    tmp_path = file_path.with_name(file_path.name + ".ai_doc_tmp")
+    tmp_path.write_bytes(text.encode("utf-8"))
+    os.replace(tmp_path, file_path)
+
+
+def docs_after_injection(
+    file_path: Path, functions: List[FunctionInfo], func_docs: Dict[int, str]
+) -> Tuple[List[FunctionInfo], Dict[int, str]]:
+    """
+    Functions of an injected file with their docstrings re-keyed from
+    pre-injection to current line numbers. Injection keeps function
+    order, so the two pair up by position. If the file no longer parses,
+    the pre-injection functions and keys are returned unchanged.
+    """
+    try:
+        injected = extract_functions_from_file(file_path)
+    except (SyntaxError, ValueError, UnicodeDecodeError):
+        return functions, func_docs
+    if len(injected) != len(functions):
+        return functions, func_docs
+    docs = dict(zip(
+        sorted(f.lineno for f in injected),
+        (doc for _, doc in sorted(func_docs.items())),
+    ))
+    return injected, docs
 
 
 def _get_indent(line: str) -> str:
     return line[: len(line) - len(line.lstrip())]
 
 
+def docstring_text(raw: str) -> str:
+    """
+    Strip the triple quotes from a generated docstring for display.
+    """
+    text = raw.strip()
+    if text.startswith('"""'):
+        text = text[3:]
+    if text.endswith('"""'):
+        text = text[:-3]
+    return text.strip()
+
+
+def _write_if_changed(path: Path, text: str) -> bool:
+    if path.exists() and path.read_text(encoding="utf-8") == text:
+        return False
+    path.write_text(text, encoding="utf-8")
+    return True
+
+
 def write_module_markdown(
     repo_path: Path,
     file_path: Path,
     module_overview: str,
     functions: List[FunctionInfo],
+    func_docs: Optional[Dict[int, str]] = None,  # lineno -> docstring text
 ) -> None:
+    """
+    Write ai_docs/<module>.md plus the JSON record the docs site is built
+    from. Files whose content is unchanged are left untouched.
+    """
+    func_docs = func_docs or {}
     docs_root = repo_path / DOCS_DIR_NAME
     docs_root.mkdir(parents=True, exist_ok=True)
 
@@ -76,7 +164,25 @@ def write_module_markdown(
     for func in functions:
         lines.append(f"### `{func.name}({', '.join(func.args)})`")
         lines.append("")
-        lines.append("*(Docstring will appear in code file; see source.)*")
+        doc = func_docs.get(func.lineno)
+        lines.append(docstring_text(doc) if doc else "*(No docstring generated.)*")
         lines.append("")
 
-    out_path.write_text("\n".join(lines), encoding="utf-8")
+    _write_if_changed(out_path, "\n".join(lines))
+
+    records_root = docs_root / MODULE_RECORDS_DIR_NAME
+    records_root.mkdir(parents=True, exist_ok=True)
+    record = {
+        "module": rel.as_posix(),
+        "overview": module_overview,
+        "functions": [
+            {
+                "name": func.name,
+                "args": func.args,
+                "lineno": func.lineno,
+                "docstring": docstring_text(func_docs[func.lineno]) if func.lineno in func_docs else "",
+            }
+            for func in sorted(functions, key=lambda f: f.lineno)
+        ],
+    }
+    _write_if_changed(records_root / f"{safe_name}.json", json.dumps(record, indent=2))
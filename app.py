@@ -1,16 +1,41 @@
+import time
+
 import streamlit as st
 from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor
 
-from ai_doc_layer.code_parser import find_python_files, extract_functions_from_file
-from ai_doc_layer.doc_generator import DocGenerator
-from ai_doc_layer.writer import inject_docstrings_into_file, write_module_markdown
+from ai_doc_layer.jobs import JobScheduler, FINISHED_STATES, QUEUED, DONE, FAILED
 from ai_doc_layer.visualizer import UMLGenerator
-from ai_doc_layer.ask_cli import CodebaseAssistant
 
 
 st.set_page_config(page_title="AI Doc Assistant", layout="wide")
 
+
+@st.cache_resource
+def get_scheduler() -> JobScheduler:
+    # One scheduler (and one loaded model) per server process, shared by all sessions
+    return JobScheduler()
+
+
+scheduler = get_scheduler()
+
+
+def _job_id(key: str):
+    # Keep the job id in the URL so a page refresh re-attaches to it
+    return st.query_params.get(key) or st.session_state.get(key)
+
+
+def _set_job_id(key: str, job_id: str):
+    st.session_state[key] = job_id
+    st.query_params[key] = job_id
+
+
+def _status_line(job):
+    if job["status"] == QUEUED:
+        pos = scheduler.queue_position(job["id"])
+        return f"⏳ Queued (position {pos})"
+    return f"{job['status'].capitalize()}: {job['message']}"
+
+
 st.title("🧠 AI Python Documentation Assistant")
 tab1, tab2, tab3 = st.tabs(["📘 Docstrings", "📊 Visualizer", "💬 Chat"])
 
@@ -30,66 +55,37 @@ with tab1:
         if not repo.exists():
             st.error("❌ Path does not exist.")
         else:
-            files = find_python_files(repo)
-            total_files = len(files)
-
-            st.info(f"🔍 Found **{total_files}** Python files.")
-
-            doc_gen = DocGenerator()
-
-            file_progress = st.progress(0, text="Starting…")
-
-            # Container to update “current function”
-            status_box = st.empty()
-
-            # Container for all file logs
-            file_log_container = st.container()
-
-            for file_index, file_path in enumerate(files, start=1):
-
-                file_progress.progress(
-                    file_index / total_files,
-                    text=f"Processing file {file_index}/{total_files}: {file_path.name}"
-                )
-
-                # Expandable section for each file
-                with file_log_container.expander(f"📂 {file_path.name}", expanded=False):
-                    functions = extract_functions_from_file(file_path)
-                    total_funcs = len(functions)
-
-                    st.write(f"📌 Found `{total_funcs}` functions.")
-
-                    func_progress = st.progress(0)
-                    func_count = 0
-
-                    func_docs = {}
-
-                    for func in functions:
-                        func_count += 1
-
-                        # LIVE STATUS UPDATE
-                        status_box.markdown(
-                            f"### 🔧 Processing function: **`{func.name}`** in `{file_path.name}`"
-                        )
-
-                        # Function progress bar
-                        func_progress.progress(func_count / total_funcs)
-
-                        # Generate docstring
-                        doc = doc_gen.generate_docstring(func, file_path)
-                        func_docs[func.lineno] = doc
-
-                        # Show each result interactively
-                        st.success(f"✔ Generated docstring for `{func.name}`")
-                        st.code(doc, language="python")
-
-                    # Inject docstrings into file
-                    inject_docstrings_into_file(file_path, func_docs)
-                    module_md = doc_gen.generate_module_overview(file_path, functions)
-                    write_module_markdown(repo, file_path, module_md, functions)
-
-            status_box.markdown("### 🎉 Completed all files!")
+            _set_job_id("doc_job", scheduler.submit_docstrings(repo))
+
+    doc_job_id = _job_id("doc_job")
+    doc_job = scheduler.poll(doc_job_id) if doc_job_id else None
+
+    if doc_job:
+        total_files = doc_job["total"]
+        st.info(f"📂 `{doc_job['params']['repo']}` — {_status_line(doc_job)}")
+        st.progress(
+            doc_job["done"] / total_files if total_files else 0.0,
+            text=f"Files {doc_job['done']}/{total_files}",
+        )
+
+        if doc_job["status"] not in FINISHED_STATES:
+            if st.button("Cancel job", key="cancel_doc"):
+                scheduler.cancel(doc_job["id"])
+
+        # Group results by file, one expander each
+        by_file = {}
+        for r in doc_job["results"]:
+            by_file.setdefault(r["file"], []).append(r)
+        for file_name, results in by_file.items():
+            with st.expander(f"📂 {Path(file_name).name}", expanded=False):
+                for r in results:
+                    st.success(f"✔ Generated docstring for `{r['function']}`")
+                    st.code(r["docstring"], language="python")
+
+        if doc_job["status"] == DONE:
             st.success("Docstring generation completed successfully!")
+        elif doc_job["status"] == FAILED:
+            st.error(doc_job["error"])
 
 
 
@@ -123,8 +119,22 @@ with tab3:
     repo_c = st.text_input("Project folder:", key="chat")
     q = st.text_area("Question:")
 
-    if st.button("Ask"):
-        assistant = CodebaseAssistant(Path(repo_c))
-        with st.spinner("Thinking..."):
-            ans = assistant.ask(q)
-        st.success(ans)
+    if st.button("Ask") and repo_c and q:
+        _set_job_id("ask_job", scheduler.submit_ask(Path(repo_c), q))
+
+    ask_job_id = _job_id("ask_job")
+    ask_job = scheduler.poll(ask_job_id) if ask_job_id else None
+
+    if ask_job:
+        if ask_job["status"] == DONE:
+            st.success(ask_job["result"])
+        elif ask_job["status"] == FAILED:
+            st.error(ask_job["error"])
+        else:
+            st.info(_status_line(ask_job))
+
+
+# Poll running jobs without blocking: rerun the script until they finish
+if any(j and j["status"] not in FINISHED_STATES for j in (doc_job, ask_job)):
+    time.sleep(1)
+    st.rerun()
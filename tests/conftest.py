@@ -0,0 +1,7 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _isolated_cwd(tmp_path, monkeypatch):
+    # The prompt and answer caches live in the working directory
+    monkeypatch.chdir(tmp_path)
@@ -0,0 +1,72 @@
+from ai_doc_layer.answer_cache import AnswerCache
+
+EVIDENCE = ["h-parse-config", "h-load"]
+
+
+def _cache(tmp_path):
+    cache = AnswerCache(path=tmp_path / "answers.json")
+    cache.put("What does parse_config do?", 4, EVIDENCE, "It parses the config.")
+    return cache
+
+
+def test_exact_lookup(tmp_path):
+    cache = _cache(tmp_path)
+    assert cache.get("what does parse_config do", 4, EVIDENCE) == "It parses the config."
+    assert cache.get("What does parse_config do?", 4, ["other"]) is None
+
+
+def test_rephrased_question_reuses_answer(tmp_path):
+    cache = _cache(tmp_path)
+    answer = cache.find_similar("What does parse_config do exactly?", 4, EVIDENCE, set(EVIDENCE))
+    assert answer == "It parses the config."
+
+
+def test_near_miss_identifiers_do_not_match(tmp_path):
+    cache = _cache(tmp_path)
+    for question in [
+        "What does parse_csv do?",
+        "what does render_config do?",
+        "What does parse_config_file do?",
+    ]:
+        assert cache.find_similar(question, 4, EVIDENCE, set(EVIDENCE)) is None
+
+
+def test_changed_meaning_does_not_match(tmp_path):
+    cache = _cache(tmp_path)
+    cache.put("What does parse_config return?", 4, EVIDENCE, "A dict.")
+    for question in [
+        "What does parse_config not return?",
+        "What doesn't parse_config return?",
+        "Does parse_config return None?",
+        "Why does parse_config return?",
+        "What does parse_config raise?",
+    ]:
+        assert cache.find_similar(question, 4, EVIDENCE, set(EVIDENCE)) is None
+    assert cache.find_similar("what does parse_config return", 4, EVIDENCE, set(EVIDENCE)) == "A dict."
+
+
+def test_longer_follow_up_does_not_match(tmp_path):
+    cache = _cache(tmp_path)
+    question = (
+        "What does parse_config do when the file is missing, and which "
+        "exceptions can callers expect from it?"
+    )
+    assert cache.find_similar(question, 4, EVIDENCE, set(EVIDENCE)) is None
+
+
+def test_requires_same_top_snippet(tmp_path):
+    cache = _cache(tmp_path)
+    evidence = ["h-other", "h-parse-config"]
+    valid = set(EVIDENCE) | set(evidence)
+    assert cache.find_similar("What does parse_config do exactly?", 4, evidence, valid) is None
+
+
+def test_stale_evidence_is_not_served(tmp_path):
+    cache = _cache(tmp_path)
+    assert cache.find_similar("What does parse_config do?", 4, EVIDENCE, {"h-parse-config"}) is None
+
+
+def test_persists_between_instances(tmp_path):
+    _cache(tmp_path)
+    reloaded = AnswerCache(path=tmp_path / "answers.json")
+    assert reloaded.get("What does parse_config do?", 4, EVIDENCE) == "It parses the config."
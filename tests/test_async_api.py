@@ -0,0 +1,138 @@
+import asyncio
+import time
+
+from ai_doc_layer.async_api import AsyncBatcher, AsyncCodebaseAssistant, AsyncDocGenerator
+from ai_doc_layer.code_parser import FunctionInfo
+from ai_doc_layer.llm_client import LLMClient
+
+
+class RecordingClient(LLMClient):
+    def __init__(self):
+        super().__init__(backend="fake")
+        self.batches = []
+
+    def generate_batch(self, prompts, extra_params=None):
+        self.batches.append(len(prompts))
+        return super().generate_batch(prompts, extra_params)
+
+
+def test_concurrent_submits_are_batched():
+    llm = RecordingClient()
+
+    async def main():
+        batcher = AsyncBatcher(llm, batch_size=4)
+        outs = await asyncio.gather(*(batcher.submit(f"q{i}", {"max_new_tokens": 8}) for i in range(10)))
+        await batcher.aclose()
+        return outs
+
+    outs = asyncio.run(main())
+    assert len(outs) == 10 and all(outs)
+    assert llm.batches == [4, 4, 2]
+
+
+def test_cancelled_request_never_reaches_model():
+    llm = RecordingClient()
+
+    async def main():
+        batcher = AsyncBatcher(llm, batch_size=4, max_wait_ms=50)
+        task = asyncio.ensure_future(batcher.submit("slow"))
+        await asyncio.sleep(0)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        await asyncio.sleep(0.1)
+        await batcher.aclose()
+        return task.cancelled()
+
+    assert asyncio.run(main())
+    assert llm.batches == []
+
+
+def test_unhashable_params_do_not_stop_the_worker():
+    llm = RecordingClient()
+
+    async def main():
+        batcher = AsyncBatcher(llm, batch_size=4)
+        first = await asyncio.gather(
+            batcher.submit("a", {"stop_sequences": ["\\n"]}),
+            batcher.submit("b", {"stop_sequences": ["\\n"]}),
+        )
+        second = await asyncio.wait_for(batcher.submit("c"), 5)
+        await batcher.aclose()
+        return first, second
+
+    first, second = asyncio.run(main())
+    assert all(first) and second
+    assert llm.batches == [2, 1]
+
+
+def test_aclose_fails_pending_requests():
+    class SlowClient(RecordingClient):
+        def generate_batch(self, prompts, extra_params=None):
+            time.sleep(0.2)
+            return super().generate_batch(prompts, extra_params)
+
+    async def main():
+        batcher = AsyncBatcher(SlowClient(), batch_size=1)
+        tasks = [asyncio.ensure_future(batcher.submit(f"q{i}")) for i in range(3)]
+        await asyncio.sleep(0.05)  # q0 is running, q1 and q2 are queued
+        await batcher.aclose()
+        return await asyncio.wait_for(asyncio.gather(*tasks, return_exceptions=True), 5)
+
+    results = asyncio.run(main())
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_stream_stops_when_consumer_stops():
+    async def main():
+        batcher = AsyncBatcher(LLMClient(backend="fake"))
+        pieces = []
+        async for piece in batcher.stream("hello", {"max_new_tokens": 20}):
+            pieces.append(piece)
+            if len(pieces) == 2:
+                break
+        await batcher.aclose()
+        return pieces
+
+    assert len(asyncio.run(main())) == 2
+
+
+def test_duplicate_bodies_share_one_generation():
+    llm = RecordingClient()
+    funcs = [
+        FunctionInfo(f"get{i}", ["self"], "def get(self):\n    return self.x\n", i, body_hash="same")
+        for i in range(1, 4)
+    ]
+
+    async def main():
+        doc_gen = await AsyncDocGenerator.create(llm=llm)
+        docs = await doc_gen.generate_docstrings(funcs, "m.py")
+        await doc_gen.aclose()
+        return docs
+
+    docs = asyncio.run(main())
+    assert len(set(docs.values())) == 1
+    assert llm.batches == [1]
+
+
+def test_shared_batcher_serves_both_apis(tmp_path):
+    (tmp_path / "m.py").write_text("def parse(text):\n    return text.split()\n", encoding="utf-8")
+    llm = RecordingClient()
+
+    async def main():
+        batcher = AsyncBatcher(llm, batch_size=8)
+        doc_gen = await AsyncDocGenerator.create(batcher=batcher)
+        assistant = await AsyncCodebaseAssistant.create(tmp_path, batcher=batcher)
+        assert doc_gen.doc_gen.llm is llm and assistant.assistant.llm is llm
+        assert doc_gen.batcher is assistant.batcher
+        func = FunctionInfo("parse", ["text"], "def parse(text):\n    return text.split()\n", 1)
+        results = await asyncio.gather(
+            doc_gen.generate_docstring(func, tmp_path / "m.py"),
+            assistant.ask("How is text tokenized here?"),
+        )
+        await batcher.aclose()
+        return results
+
+    doc, answer = asyncio.run(main())
+    assert doc and answer
+    # Different sampling params are dispatched as separate groups
+    assert llm.batches == [1, 1]
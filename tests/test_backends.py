@@ -0,0 +1,41 @@
+import pytest
+
+from ai_doc_layer.backends import get_backend
+from ai_doc_layer.llm_client import LLMClient
+
+
+def test_fake_generate_is_deterministic():
+    llm = LLMClient(backend="fake")
+    first = llm.generate("Describe add()", extra_params={"max_new_tokens": 8})
+    assert first == llm.generate("Describe add()", extra_params={"max_new_tokens": 8})
+    assert first != llm.generate("Describe sub()", extra_params={"max_new_tokens": 8})
+
+
+def test_fake_batch_matches_single_generation():
+    llm = LLMClient(backend="fake")
+    prompts = ["one", "two", "three"]
+    assert llm.generate_batch(prompts) == [llm.generate(p) for p in prompts]
+
+
+def test_fake_stream_joins_to_generation():
+    llm = LLMClient(backend="fake")
+    pieces = list(llm.stream("hello", extra_params={"max_new_tokens": 8}))
+    assert len(pieces) > 1
+    assert "".join(pieces) == llm.generate("hello", extra_params={"max_new_tokens": 8})
+
+
+def test_fake_honours_max_new_tokens():
+    llm = LLMClient(backend="fake")
+    out = llm.generate("hello", extra_params={"max_new_tokens": 1})
+    assert llm.count_tokens(out) == 1
+
+
+def test_fake_should_stop():
+    llm = LLMClient(backend="fake")
+    assert llm.generate_batch(["a", "b"], extra_params={"should_stop": lambda: True}) == ["", ""]
+    assert list(llm.stream("a", extra_params={"should_stop": lambda: True})) == []
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        get_backend("nope")
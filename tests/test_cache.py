@@ -0,0 +1,27 @@
+import multiprocessing
+
+from ai_doc_layer import cache
+
+
+def _writer(worker: int, count: int) -> None:
+    for i in range(count):
+        cache.save_to_cache(f"prompt-{worker}-{i}", f"answer-{worker}-{i}")
+
+
+def test_round_trip():
+    cache.save_to_cache("prompt", "answer", extra={"file": "m.py"})
+    assert cache.load_from_cache("prompt", extra={"file": "m.py"}) == "answer"
+    assert cache.load_from_cache("prompt") is None
+
+
+def test_concurrent_processes_keep_every_entry():
+    ctx = multiprocessing.get_context("fork")
+    procs = [ctx.Process(target=_writer, args=(w, 25)) for w in range(4)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+
+    for w in range(4):
+        for i in range(25):
+            assert cache.load_from_cache(f"prompt-{w}-{i}") == f"answer-{w}-{i}"
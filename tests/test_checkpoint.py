@@ -0,0 +1,43 @@
+from ai_doc_layer.checkpoint import Journal, file_hash, stage_reached, text_hash
+from ai_doc_layer.writer import render_injected, write_source
+
+SOURCE = "def f(a):\n    return a\n"
+DOCS = {1: '"""Return a."""'}
+
+
+def test_record_and_resume(tmp_path):
+    src = tmp_path / "m.py"
+    src.write_text(SOURCE, encoding="utf-8")
+    journal = Journal(tmp_path / "journal.json")
+    journal.record("m.py", "generated", file_hash(src), flush=True, docs=DOCS)
+
+    entry = Journal.load(tmp_path / "journal.json").get("m.py", file_hash(src))
+    assert stage_reached(entry, "generated")
+    assert not stage_reached(entry, "injected")
+
+
+def test_edited_file_is_redone(tmp_path):
+    journal = Journal(tmp_path / "journal.json")
+    journal.record("m.py", "markdown", "old-hash", flush=True)
+    assert Journal.load(tmp_path / "journal.json").get("m.py", "new-hash") is None
+
+
+def test_write_that_landed_without_its_record_resumes_as_injected(tmp_path):
+    src = tmp_path / "m.py"
+    src.write_text(SOURCE, encoding="utf-8")
+    journal = Journal(tmp_path / "journal.json", flush_every=100)
+    journal.record("m.py", "generated", file_hash(src), docs=DOCS)
+
+    injected = render_injected(SOURCE, DOCS)
+    journal.intend("m.py", "injected", text_hash(injected))
+    write_source(src, injected)
+    # killed here: the "injected" record never reaches disk
+
+    entry = Journal.load(tmp_path / "journal.json").get("m.py", file_hash(src))
+    assert stage_reached(entry, "injected")
+
+
+def test_injection_skips_functions_with_docstrings():
+    once = render_injected(SOURCE, DOCS)
+    assert once == 'def f(a):\n    """Return a."""\n    return a\n'
+    assert render_injected(once, DOCS) == once
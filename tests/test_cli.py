@@ -0,0 +1,14 @@
+from click.testing import CliRunner
+
+from ai_doc_layer.cli import cli
+from ai_doc_layer.inference_pool import available_cpus
+
+
+def test_too_many_replicas_is_a_usage_error(tmp_path):
+    (tmp_path / "m.py").write_text("def f():\n    return 1\n", encoding="utf-8")
+    replicas = len(available_cpus()) + 1
+
+    result = CliRunner().invoke(cli, ["generate", str(tmp_path), "--replicas", str(replicas)])
+
+    assert result.exit_code == 2
+    assert "Invalid value for --replicas" in result.output
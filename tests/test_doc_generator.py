@@ -0,0 +1,76 @@
+import threading
+import time
+from pathlib import Path
+
+from ai_doc_layer.code_parser import extract_functions_from_file
+from ai_doc_layer.doc_generator import DocGenerator
+from ai_doc_layer.llm_client import LLMClient
+
+GETTERS = "".join(
+    f"class C{i}:\n    def get(self):\n        return self.value\n\n" for i in range(8)
+)
+
+
+class CountingClient(LLMClient):
+    def __init__(self):
+        super().__init__(backend="fake")
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def generate(self, prompt, extra_params=None):
+        with self._lock:
+            self.calls += 1
+        time.sleep(0.05)  # long enough for concurrent duplicates to overlap
+        return super().generate(prompt, extra_params)
+
+
+def _functions(tmp_path: Path):
+    src = tmp_path / "getters.py"
+    src.write_text(GETTERS, encoding="utf-8")
+    return src, extract_functions_from_file(src)
+
+
+def test_identical_bodies_generated_once_with_workers(tmp_path):
+    src, functions = _functions(tmp_path)
+    llm = CountingClient()
+    doc_gen = DocGenerator(llm=llm, max_workers=4)
+
+    docs = doc_gen.generate_docstrings(functions, src)
+
+    assert llm.calls == 1
+    assert len(docs) == 8 and len(set(docs.values())) == 1
+    assert doc_gen.requested == 8
+    assert doc_gen.unique_generated == 1
+
+
+def test_identical_bodies_generated_once_batched(tmp_path):
+    src, functions = _functions(tmp_path)
+    llm = LLMClient(backend="fake")
+    doc_gen = DocGenerator(llm=llm, batch_size=4)
+
+    docs = doc_gen.generate_docstrings(functions, src)
+
+    assert len(set(docs.values())) == 1
+    assert doc_gen.requested == 8 and doc_gen.unique_generated == 1
+
+
+def test_cached_docstrings_are_scoped_to_prompt_and_model(tmp_path):
+    src, functions = _functions(tmp_path)
+    DocGenerator(llm=CountingClient()).generate_docstrings(functions[:1], src)
+
+    same = CountingClient()
+    DocGenerator(llm=same).generate_docstrings(functions[:1], src)
+    assert same.calls == 0
+
+    other_model = CountingClient()
+    other_model.model_id = "other/model"
+    DocGenerator(llm=other_model).generate_docstrings(functions[:1], src)
+    assert other_model.calls == 1
+
+    class NewPrompt(DocGenerator):
+        def docstring_prompt(self, func):
+            return "Document this function.\n" + func.code
+
+    new_prompt = CountingClient()
+    NewPrompt(llm=new_prompt).generate_docstrings(functions[:1], src)
+    assert new_prompt.calls == 1
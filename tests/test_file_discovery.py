@@ -0,0 +1,95 @@
+import subprocess
+
+import pytest
+
+from ai_doc_layer.file_discovery import GitIgnore, iter_python_files
+
+
+def _ignored(patterns, path, is_dir=False, base=""):
+    return GitIgnore(base, patterns).match(path, is_dir)
+
+
+def test_unanchored_pattern_matches_at_any_depth():
+    assert _ignored(["*.log"], "debug.log")
+    assert _ignored(["*.log"], "a/b/debug.log")
+    assert _ignored(["*.log"], "a/debug.py") is None
+
+
+def test_anchored_pattern_matches_only_at_base():
+    assert _ignored(["/build"], "build", is_dir=True)
+    assert _ignored(["/build"], "pkg/build", is_dir=True) is None
+    assert _ignored(["docs/*.py"], "docs/conf.py")
+    assert _ignored(["docs/*.py"], "src/docs/conf.py") is None
+
+
+def test_negation_last_rule_wins():
+    rules = ["*.py", "!keep.py"]
+    assert _ignored(rules, "drop.py") is True
+    assert _ignored(rules, "keep.py") is False
+
+
+def test_dir_only_pattern_skips_files():
+    assert _ignored(["tmp/"], "tmp", is_dir=True)
+    assert _ignored(["tmp/"], "tmp") is None
+
+
+def test_double_star_patterns():
+    assert _ignored(["**/gen"], "gen", is_dir=True)
+    assert _ignored(["**/gen"], "a/b/gen", is_dir=True)
+    assert _ignored(["a/**/b.py"], "a/b.py")
+    assert _ignored(["a/**/b.py"], "a/x/y/b.py")
+    assert _ignored(["out/**"], "out/x/y.py")
+    assert _ignored(["out/**"], "out", is_dir=True) is None
+
+
+def test_nested_gitignore_is_relative_to_its_dir():
+    assert _ignored(["/cache.py"], "pkg/cache.py", base="pkg")
+    assert _ignored(["/cache.py"], "other/cache.py", base="pkg") is None
+
+
+def _rels(repo, **kwargs):
+    return [p.relative_to(repo).as_posix() for p in iter_python_files(repo, **kwargs)]
+
+
+def test_walk_honours_gitignore_and_root_only_excludes(tmp_path):
+    for rel in [
+        "main.py", "gen/out.py", "pkg/keep.py", "pkg/skip.py",
+        "build/setup_out.py", "pkg/build/steps.py", "pkg/env/settings.py",
+        "node_modules/x.py", "venv2/lib.py",
+    ]:
+        (tmp_path / rel).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / rel).write_text("", encoding="utf-8")
+    (tmp_path / "venv2" / "pyvenv.cfg").write_text("", encoding="utf-8")
+    (tmp_path / ".gitignore").write_text("gen/\n", encoding="utf-8")
+    (tmp_path / "pkg" / ".gitignore").write_text("*.py\n!keep.py\n!steps.py\n!settings.py\n", encoding="utf-8")
+
+    assert sorted(_rels(tmp_path)) == [
+        "main.py", "pkg/build/steps.py", "pkg/env/settings.py", "pkg/keep.py",
+    ]
+    assert "gen/out.py" in _rels(tmp_path, use_gitignore=False)
+
+
+def test_tracked_only_outside_git_raises_value_error(tmp_path):
+    (tmp_path / "m.py").write_text("", encoding="utf-8")
+    with pytest.raises(ValueError):
+        iter_python_files(tmp_path, tracked_only=True)
+
+
+def test_tracked_only_lists_git_files(tmp_path):
+    (tmp_path / "tracked.py").write_text("", encoding="utf-8")
+    (tmp_path / "untracked.py").write_text("", encoding="utf-8")
+    subprocess.run(["git", "init", "-q", str(tmp_path)], check=True)
+    subprocess.run(["git", "-C", str(tmp_path), "add", "tracked.py"], check=True)
+    assert _rels(tmp_path, tracked_only=True) == ["tracked.py"]
+
+
+def test_tracked_only_exclude_matches_parent_dirs(tmp_path):
+    for rel in ["main.py", "tests/t.py", "pkg/tests/u.py", "pkg/m.py"]:
+        (tmp_path / rel).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / rel).write_text("", encoding="utf-8")
+    subprocess.run(["git", "init", "-q", str(tmp_path)], check=True)
+    subprocess.run(["git", "-C", str(tmp_path), "add", "."], check=True)
+
+    expected = ["main.py", "pkg/m.py"]
+    assert _rels(tmp_path, tracked_only=True, exclude=["tests"]) == expected
+    assert sorted(_rels(tmp_path, exclude=["tests"])) == expected
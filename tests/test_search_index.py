@@ -0,0 +1,23 @@
+import os
+
+from ai_doc_layer.search_index import SearchIndex
+
+
+def test_is_stale_tracks_changed_added_and_removed_files(tmp_path):
+    src = tmp_path / "m.py"
+    src.write_text("def f():\n    return 1\n", encoding="utf-8")
+    index = SearchIndex()
+    index.build_index(tmp_path)
+    assert not index.is_stale(tmp_path)
+
+    src.write_text("def f():\n    return 12\n", encoding="utf-8")
+    assert index.is_stale(tmp_path)
+    index.build_index(tmp_path)
+    assert not index.is_stale(tmp_path)
+    assert any("return 12" in d for d in index.docs)
+
+    (tmp_path / "n.py").write_text("def g():\n    pass\n", encoding="utf-8")
+    assert index.is_stale(tmp_path)
+    index.build_index(tmp_path)
+    os.remove(tmp_path / "n.py")
+    assert index.is_stale(tmp_path)
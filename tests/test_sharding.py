@@ -0,0 +1,53 @@
+import ast
+
+from click.testing import CliRunner
+
+from ai_doc_layer.cli import cli
+from ai_doc_layer.sharding import assign_shards
+
+WEIGHTS = {"a.py": 9, "b.py": 7, "c.py": 6, "d.py": 5, "e.py": 4, "f.py": 2, "g.py": 0, "h.py": 1}
+
+
+def test_assignment_does_not_depend_on_input_order():
+    reordered = dict(sorted(WEIGHTS.items(), key=lambda kv: kv[1]))
+    assert assign_shards(WEIGHTS, 3) == assign_shards(reordered, 3)
+
+
+def test_assignment_is_balanced_by_function_count():
+    assignment = assign_shards(WEIGHTS, 3)
+    loads = {shard: 0 for shard in range(1, 4)}
+    for rel, shard in assignment.items():
+        loads[shard] += max(WEIGHTS[rel], 1)
+
+    assert set(assignment) == set(WEIGHTS)
+    assert max(loads.values()) - min(loads.values()) <= max(WEIGHTS.values())
+
+
+def test_shard_then_merge_round_trip(tmp_path, monkeypatch):
+    monkeypatch.setattr("ai_doc_layer.llm_client.LLM_BACKEND", "fake")
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    for name in ["a", "b", "c"]:
+        (repo / f"{name}.py").write_text(f"def {name}(x):\n    return x\n", encoding="utf-8")
+    (repo / "broken.py").write_text("def broken(:\n", encoding="utf-8")
+
+    runner = CliRunner()
+    for shard in ["1/2", "2/2"]:
+        result = runner.invoke(cli, ["generate", str(repo), "--shard", shard])
+        assert result.exit_code == 0, result.output
+    # Nothing is written into the sources before merge
+    assert (repo / "a.py").read_text(encoding="utf-8") == "def a(x):\n    return x\n"
+
+    result = runner.invoke(cli, ["merge", str(repo)])
+    assert result.exit_code == 0, result.output
+    assert "Merged 3 files" in result.output
+    merged = {p.name: p.read_text(encoding="utf-8") for p in repo.glob("*.py")}
+    assert merged.pop("broken.py") == "def broken(:\n"
+    for text in merged.values():
+        func = ast.parse(text).body[0]
+        assert ast.get_docstring(func)
+
+    result = runner.invoke(cli, ["merge", str(repo)])
+    assert result.exit_code == 0, result.output
+    assert "Merged 0 files" in result.output and "3 already merged, 0 stale" in result.output
+    assert {p.name: p.read_text(encoding="utf-8") for p in repo.glob("*.py") if p.name != "broken.py"} == merged
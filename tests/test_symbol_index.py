@@ -0,0 +1,59 @@
+import ast
+
+from ai_doc_layer.symbol_index import SymbolIndex, extract_file_symbols
+
+SOURCE = """
+import json
+
+def parse_config(text):
+    return json.loads(text)
+
+def load_config(path):
+    return parse_config(open(path).read())
+
+class Base:
+    pass
+
+class Child(Base):
+    def run(self):
+        return load_config("x")
+"""
+
+
+def _index():
+    index = SymbolIndex()
+    index.add_file("m.py", extract_file_symbols(ast.parse(SOURCE)))
+    return index
+
+
+def test_lookup_questions_are_answered():
+    index = _index()
+    assert "m.py:8 in `load_config`" in index.answer("Where is parse_config called?")
+    assert "m.py:8" in index.answer("who calls `parse_config()`?")
+    assert "function `load_config`" in index.answer("where is load_config defined")
+    assert "`Child`" in index.answer("What subclasses Base?")
+    assert "(json)" in index.answer("Who imports json?")
+
+
+def test_open_questions_fall_through():
+    index = _index()
+    for question in [
+        "Why does load_config call parse_config?",
+        "How is parse_config used to validate input, and what does it return?",
+        "Explain the algorithm in parse_config and where is it slow?",
+        "Where is it slow?",
+    ]:
+        assert index.answer(question) is None
+
+
+def test_no_zero_place_answers():
+    index = _index()
+    # run is defined but never called
+    assert index.answer("Where is run called?") is None
+    assert index.answer("Where is unknown_name defined?") is None
+
+
+def test_callers_and_callees():
+    index = _index()
+    assert index.callers_of("m.py", 4) == [("m.py", 7)]
+    assert index.callees_of("m.py", 7) == [("m.py", 4)]
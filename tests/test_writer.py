@@ -0,0 +1,88 @@
+import ast
+import json
+
+from ai_doc_layer.code_parser import extract_functions_from_file
+from ai_doc_layer.writer import (
+    MODULE_RECORDS_DIR_NAME,
+    docs_after_injection,
+    inject_docstrings_into_file,
+    render_injected,
+    write_module_markdown,
+)
+
+SOURCE = "def f(a):\n    return a\n\n\ndef g(b):\n    return b\n"
+DOCS = {1: '"""Return a."""', 5: '"""Return b."""'}
+
+
+def test_docs_are_rekeyed_to_post_injection_lines(tmp_path):
+    src = tmp_path / "m.py"
+    src.write_text(SOURCE, encoding="utf-8")
+    before = extract_functions_from_file(src)
+    inject_docstrings_into_file(src, DOCS)
+
+    functions, docs = docs_after_injection(src, before, DOCS)
+
+    assert sorted((f.name, f.lineno) for f in functions) == [("f", 1), ("g", 6)]
+    assert docs == {1: '"""Return a."""', 6: '"""Return b."""'}
+
+
+def test_module_record_uses_given_line_numbers(tmp_path):
+    src = tmp_path / "m.py"
+    src.write_text(SOURCE, encoding="utf-8")
+    before = extract_functions_from_file(src)
+    inject_docstrings_into_file(src, DOCS)
+    functions, docs = docs_after_injection(src, before, DOCS)
+
+    write_module_markdown(tmp_path, src, "Overview.", functions, docs)
+
+    record = json.loads((tmp_path / "ai_docs" / MODULE_RECORDS_DIR_NAME / "m.py.json").read_text())
+    assert [(f["name"], f["lineno"], f["docstring"]) for f in record["functions"]] == [
+        ("f", 1, "Return a."),
+        ("g", 6, "Return b."),
+    ]
+
+
+def _docstrings(source):
+    return {
+        n.name: ast.get_docstring(n) for n in ast.walk(ast.parse(source))
+        if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef))
+    }
+
+
+def test_multi_line_signature():
+    source = "def f(\n    a,\n    b,\n):\n    return a + b\n"
+    out = render_injected(source, {1: '"""Add."""'})
+    assert out == "def f(\n    a,\n    b,\n):\n    \"\"\"Add.\"\"\"\n    return a + b\n"
+
+
+def test_one_line_defs():
+    source = "def one(a): return a\n\nclass C:\n    def two(self, x): y = x; return y\n"
+    out = render_injected(source, {1: '"""One."""', 4: '"""Two."""'})
+    assert _docstrings(out) == {"one": "One.", "two": "Two."}
+    assert "    return a\n" in out and "        y = x; return y\n" in out
+
+
+def test_decorated_and_async_first_statements():
+    source = (
+        "async def outer():\n"
+        "    # comment\n"
+        "    @wrap\n"
+        "    def inner():\n"
+        "        pass\n"
+        "    return inner\n"
+    )
+    out = render_injected(source, {1: '"""Outer."""', 4: '"""Inner."""'})
+    assert _docstrings(out) == {"outer": "Outer.", "inner": "Inner."}
+
+
+def test_existing_docstring_is_kept():
+    source = "def f():\n    \'\'\'Already.\'\'\'\n    return 1\n"
+    assert render_injected(source, {1: '"""New."""'}) == source
+
+
+def test_unparseable_file_falls_back(tmp_path):
+    src = tmp_path / "m.py"
+    src.write_text(SOURCE, encoding="utf-8")
+    functions = extract_functions_from_file(src)
+    src.write_text("def f(:\n", encoding="utf-8")
+    assert docs_after_injection(src, functions, DOCS) == (functions, DOCS)